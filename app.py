@@ -1,54 +1,96 @@
 import os
-import time
 from datetime import datetime
 import streamlit as st
 import pandas as pd
 
-from dataframe_manager.manage_dataframe import DataFrameManager
-from nlp.nlp import predict_task_info
-from priority_prediction.predict_priority import predict_priority
-from hours_estimatror.estimate_hours import predict_hours
+from dataframe_manager.manage_dataframe import DataFrameManager, PAGE_SIZE, SORT_COLUMNS
+from dataframe_manager.archive import ARCHIVED_STATUS
+from nlp.nlp import warm_up, nlp_status
+from nlp.task_index import get_task_index, DUPLICATE_THRESHOLD
+from logger_n_exception.metrics import start_metrics_dump
+from priority_prediction.predict_priority import load_priority_model
+from hours_estimatror.estimate_hours import load_hours_model
 from assigneed_to.suggest_assignee import suggest_assignee
+from assigneed_to.bulk_assign import assign_backlog
+from task_pipeline.background import create_tasks_async
 from visualization.visualize import VisualizationManager
 
-if 'view_added' not in st.session_state:
-    st.session_state.view_added = ("", "", "")
+if 'predictions' not in st.session_state:
+    st.session_state.predictions = {}  # task_id -> Future of the background prediction
 
 st.set_page_config(layout="wide")
 
+# load spaCy and the models in the background so the task board renders right away
+warm_up(extra_models=[load_hours_model, load_priority_model])
+start_metrics_dump()
+
 st.title("Smart Task Management System")
 cols_required = ["task_id", "title", "created_at", "due_date", "status", "description", "category", "type", "priority", "estimated_hours", "assignee"]
+# the task list only ships these columns of the current page to the browser
+LIST_COLUMNS = [col for col in cols_required if col != "description"]
+SORT_LABELS = {"task_id": "Task ID", "created_at": "Created At", "due_date": "Due Date"}
+
+# load dataframe (process-wide snapshot, only re-read when the files change)
+df_mgr = DataFrameManager(shared=True, compact_dtypes=True)
+df = df_mgr.get_dataframe()  # created_at / due_date come back as datetimes
 
-# load dataframe
-df_mgr = DataFrameManager()
-df = df_mgr.get_dataframe()
+st.session_state.tasks = df[(df['status'] == "To Do")].head(10)
+# completed tasks may all have been moved to the archive
+statuses = sorted(set(df['status'].unique().tolist()) | {ARCHIVED_STATUS})
 
 
-for col in ["created_at", "due_date"]:
-    df[col] = pd.to_datetime(df[col], errors='coerce')
+def show_predictions():
+    """Shows the finished predictions of the tasks created in this session."""
+    for task_id, future in list(st.session_state.predictions.items()):
+        if not future.done():
+            continue
+        del st.session_state.predictions[task_id]
+        if future.exception() is not None:
+            st.error(f"Could not predict the details of task {task_id}. Check that the NLP models are installed.")
+            continue
+        predicted = future.result().iloc[0]
+        st.success(f"🎯 Auto-predicted details of task {task_id}:")
+        cols = st.columns(3)
+        cols[0].metric("Type", predicted['type'])
+        cols[1].metric("Category", predicted['category'])
+        cols[2].metric("Priority", predicted['priority'])
 
-st.session_state.tasks = df[(df['status'] == "To Do")].head(10)
 
+def find_duplicates(title, description):
+    """(task_id, title, score) of existing tasks that look like the same work as the new one."""
+    if nlp_status()['state'] != 'ready':
+        return []
+    try:
+        task_ids, scores = get_task_index(df_mgr.file_path).similar(f"{title}. {description}", min_score=DUPLICATE_THRESHOLD)
+    except ValueError:
+        # spaCy model without word vectors
+        return []
+    duplicates = []
+    for task_id, score in zip(task_ids.tolist(), scores.tolist()):
+        try:
+            duplicates.append((task_id, df_mgr.get_task(task_id)['title'].iloc[0], score))
+        except KeyError:
+            continue
+    return duplicates
 
-def view_artifact(cat, type_, priority):
-   prediction_placeholder = st.empty()
-   with prediction_placeholder.container():
-    with st.spinner('Predicting task details...'):
-            time.sleep(1)  # Simulate model processing
-            st.success("🎯 Auto-predicted Task Details:")
-            # Display the predicted task details
-            cols = st.columns(3)
-            cols[0].metric("Type", type_)
-            cols[1].metric("Category", cat)
-            cols[2].metric("Priority", priority)
-            
-            # Remove after 5 seconds
-    time.sleep(2)  # Display duration
-    prediction_placeholder.empty()
+
+@st.fragment(run_every=1)
+def wait_for_predictions():
+    """Polls the running predictions and reruns the page once they are all done."""
+    pending = [task_id for task_id, future in st.session_state.predictions.items() if not future.done()]
+    if pending:
+        st.info(f"⏳ Predicting details of task(s) {', '.join(map(str, pending))}...")
+    else:
+        st.rerun()
 
 # Sidebar for task creation
 with st.sidebar:
     st.header("➕ Create New Task")
+    model_state = nlp_status()
+    if model_state['state'] == 'failed':
+        st.error(f"Task prediction unavailable: {model_state['error']}")
+    elif model_state['state'] != 'ready':
+        st.caption("⏳ Prediction models are loading...")
     with st.form("task_form"):
         title = st.text_input("Task Title*")
         created_at = st.date_input("Created At*", value=datetime.today(), disabled=True)
@@ -61,7 +103,6 @@ with st.sidebar:
                 st.error("All fields are required!")
             else:
                 new_task = {
-                    "task_id": df["task_id"].max() + 1,
                     "title": [title],
                     "created_at": [pd.to_datetime(created_at)],
                     "due_date": [pd.to_datetime(due_date)],
@@ -76,24 +117,21 @@ with st.sidebar:
                 elif (new_task['estimated_hours'][0] / new_task['expected_days'][0]) > 8:
                     st.error("Estimated hours per day exceeds 8 hours. Please adjust the estimated hours or due date.")
                 else:
-                # Predict task category, type, and priority
-                    cat, type_ = predict_task_info(title + ". " + description)
-                    new_task["category"] = cat
-                    new_task["type"] = type_
-                    new_task['estimated_hours'] = predict_hours(pd.DataFrame(new_task))
-                    new_task['priority'] = predict_priority(pd.DataFrame(new_task))
+                    # stored right away, category / type / hours / priority are filled in by a worker
                     new_task.pop('expected_days', None)
-                    st.session_state.view_added = [cat, type_, new_task['priority']]
-                    df_mgr.update_dataframe(pd.DataFrame(new_task))
-
+                    duplicates = find_duplicates(title, description)
+                    (task_id,), future = create_tasks_async(df_mgr, pd.DataFrame(new_task))
+                    st.session_state.predictions[task_id] = future
                     st.success("Task created successfully!")
+                    if duplicates:
+                        st.warning("Possible duplicates of existing tasks:\n" + "\n".join(
+                            f"- #{dup_id} {dup_title} ({score:.0%} similar)" for dup_id, dup_title, score in duplicates))
 
 
 # Main content area
-if st.session_state.view_added != ("", "", ""):
-    cat, type_, priority = st.session_state.view_added
-    view_artifact(cat, type_, priority)
-    st.session_state.view_added = ("", "", "")
+show_predictions()
+if st.session_state.predictions:
+    wait_for_predictions()
 
 col1, col2 = st.columns([4, 1])
 
@@ -105,13 +143,22 @@ with col2:
     st.metric("To Do Tasks", len(df[df["status"] == "To Do"]))
     st.metric("High Priority", len(df[df["priority"] == "High"]))
 
+    if st.button("Auto-assign Backlog", icon="🤖", help="Assign every unassigned To Do task at once"):
+        assignments = assign_backlog(df, df['assignee'].dropna().unique().tolist(), df_mgr.assignee_index)
+        if assignments:
+            df_mgr.update_tasks({task_id: {'assignee': assignee} for task_id, assignee in assignments.items()})
+            st.success(f"Assigned {len(assignments)} tasks.")
+            st.rerun()
+        else:
+            st.info("No unassigned To Do tasks could be assigned.")
+
     st.write("---") # Separator for visual clarity
     st.subheader("🔍 Filter Tasks")
     # Ensure "All" option is available and values are sorted for better UX
-    all_statuses = ["All"] + sorted(df['status'].unique().tolist())
-    all_categories = ["All"] + sorted(df['category'].unique().tolist())
-    all_types = ["All"] + sorted(df['type'].unique().tolist())
-    all_priorities = ["All"] + sorted(df['priority'].unique().tolist(), key=lambda x: ['High', 'Medium', 'Low'].index(x) if x in ['High', 'Medium', 'Low'] else 99) # Custom sort for priority
+    all_statuses = ["All"] + statuses
+    all_categories = ["All"] + sorted(df['category'].dropna().unique().tolist())
+    all_types = ["All"] + sorted(df['type'].dropna().unique().tolist())
+    all_priorities = ["All"] + sorted(df['priority'].dropna().unique().tolist(), key=lambda x: ['High', 'Medium', 'Low'].index(x) if x in ['High', 'Medium', 'Low'] else 99) # Custom sort for priority
     all_assignees = ["All", "Unassigned"] + sorted(df['assignee'].dropna().unique().tolist())
 
 
@@ -122,37 +169,47 @@ with col2:
     selected_assignee_filter = st.selectbox("Assigned To", all_assignees, key="filter_assignee")
 
     # --- Apply Filters to the DataFrame ---
-    filtered_df = df.copy() # Always start with a fresh copy of the original data
-
+    filters = {}
     if selected_status != "All":
-        filtered_df = filtered_df[filtered_df['status'] == selected_status]
+        filters['status'] = selected_status
     if selected_category != "All":
-        filtered_df = filtered_df[filtered_df['category'] == selected_category]
+        filters['category'] = selected_category
     if selected_type != "All":
-        filtered_df = filtered_df[filtered_df['type'] == selected_type]
+        filters['type'] = selected_type
     if selected_priority != "All":
-        filtered_df = filtered_df[filtered_df['priority'] == selected_priority]
+        filters['priority'] = selected_priority
     if selected_assignee_filter != "All":
-        if selected_assignee_filter == "Unassigned":
-            filtered_df = filtered_df[filtered_df['assignee'].isnull()]
-        else:
-            filtered_df = filtered_df[filtered_df['assignee'] == selected_assignee_filter]
+        # None selects tasks without an assignee
+        filters['assignee'] = None if selected_assignee_filter == "Unassigned" else selected_assignee_filter
 
     # You can also add a search box for title/description
     search_query = st.text_input("Search Title/Description", key="filter_search_query")
-    if search_query:
-        filtered_df = filtered_df[
-            filtered_df['title'].str.contains(search_query, case=False, na=False) |
-            filtered_df['description'].str.contains(search_query, case=False, na=False)
-        ]
+    sort_by = st.selectbox("Sort By", SORT_COLUMNS, format_func=SORT_LABELS.get, key="sort_by")
+    descending = st.checkbox("Descending", key="sort_descending")
+
+# the pages are fetched with a cursor, the cursors of the pages seen so far allow going back
+page_query = (tuple(filters.items()), search_query, sort_by, descending)
+if st.session_state.get('page_query') != page_query:
+    st.session_state.page_query = page_query
+    st.session_state.page_cursors = [None]
+page_cursors = st.session_state.page_cursors
+# pushed down to the storage backend (indexed SQL + full-text search on SQLite)
+page_df, next_cursor, total = df_mgr.page_tasks(filters, search_query, sort_by, descending, after=page_cursors[-1],
+                                                page_size=PAGE_SIZE, columns=LIST_COLUMNS)
+
+
+def visualization_manager():
+    # charts count every matching task, so the filtered table is only built when one is requested;
+    # rendered charts are reused until the data (version) or the selection changes
+    return VisualizationManager(df_mgr.filter_tasks(filters, search=search_query),
+                                cache_key=(df_mgr.version, tuple(filters.items()), search_query))
 
-displayed_df = filtered_df
-viz_mgr = VisualizationManager(displayed_df)
 
 with col1:
     st.subheader("📋 Task List")
+    page_start = (len(page_cursors) - 1) * PAGE_SIZE
     selected_df = st.dataframe(
-        displayed_df,
+        page_df,
         use_container_width=True,
         column_config={
             "task_id": st.column_config.NumberColumn("Task ID"),
@@ -160,7 +217,6 @@ with col1:
             "created_at": st.column_config.DateColumn("Created At"),
             "due_date": st.column_config.DateColumn("Due Date"),
             "status": st.column_config.TextColumn("Status"),
-            "description": st.column_config.TextColumn("Description"),
             "category": st.column_config.TextColumn("Category"),
             "type": st.column_config.TextColumn("Type"),
             "estimated_hours": st.column_config.NumberColumn("Estimated Hours"),
@@ -169,27 +225,34 @@ with col1:
         },
         selection_mode="single-row",
         on_select="rerun",
-        key="task_list_dataframe",
+        key=f"task_list_dataframe_{len(page_cursors)}",  # a new page starts without a selection
         hide_index=True
     )
+    prev_col, info_col, next_col = st.columns([1, 4, 1])
+    prev_col.button("◀ Previous", key="previous_page_button", disabled=len(page_cursors) == 1,
+                    on_click=page_cursors.pop)
+    info_col.caption(f"Tasks {page_start + 1 if total else 0}–{page_start + len(page_df)} of {total}")
+    next_col.button("Next ▶", key="next_page_button", disabled=next_cursor is None,
+                    on_click=page_cursors.append, args=(next_cursor,))
     st.write("Select a task to view details and perform actions.")
     # Add a button to visualize tasks
     # Visualize tasks
     if st.button("Visualize Tasks", key="visualize_tasks_button"):
-        if not displayed_df.empty:
-            st.pyplot(viz_mgr.plot_tasks())
+        if total:
+            st.image(visualization_manager().tasks_png())
     
     if st.button("Visualize Workload", key="visualize_workload_button"):
         display_cols = ['category', 'type', 'priority', 'status']
-        if not displayed_df.empty:
+        if total:
             if selected_assignee_filter != "All":
-                st.pyplot(viz_mgr.plot_workload_per_assignee(display_cols, assignee=selected_assignee_filter))
+                st.image(visualization_manager().workload_png(display_cols, assignee=selected_assignee_filter))
     
     # Check if a row was selected
-    if selected_df["selection"]["rows"]:
+    if selected_df["selection"]["rows"] and selected_df["selection"]["rows"][0] < len(page_df):
         selected_row_index = selected_df["selection"]["rows"][0]
-        selected_task_id = displayed_df.iloc[selected_row_index]["task_id"]
-        st.session_state.selected_task = df[df['task_id'] == selected_task_id].iloc[0].to_dict()
+        selected_task_id = page_df.iloc[selected_row_index]["task_id"]
+        # task_id index lookup instead of a scan of the whole table
+        st.session_state.selected_task = df_mgr.get_task(selected_task_id).iloc[0].to_dict()
         st.write("---") # Separator
         st.subheader("Selected Task Details:")
         st.json(st.session_state.selected_task) # Display selected task as JSON
@@ -197,8 +260,7 @@ with col1:
         # operations on the selected task
         if st.button("Mark as Complete", key="mark_complete_button"):
             # update your data source
-            df.loc[df['task_id'] == selected_task_id, 'status'] = 'Completed'
-            df.to_csv("task_logs/tasks_data.csv", index=False)
+            df_mgr.complete_task(selected_task_id)
             # For demonstration, we'll just show a message.
             st.success(f"Task '{st.session_state.selected_task['title']}' marked as complete!")
             st.session_state.selected_task = None # Clear selection after action
@@ -216,7 +278,7 @@ with col1:
             # open a form here to edit the task details.
             with st.form("edit_task_form"):
                 new_due_date = st.date_input("New Due Date", value=st.session_state.selected_task['due_date'])
-                new_status = st.selectbox("New Status", options=df.status.unique().tolist())
+                new_status = st.selectbox("New Status", options=statuses)
                 initial_assignee_for_selectbox = st.session_state.suggested_assignee_value if 'suggested_assignee_value' in st.session_state else ''
                 # Get all unique assignees from your DataFrame
                 all_assignees = df['assignee'].dropna().unique().tolist()
@@ -242,7 +304,10 @@ with col1:
                         st.session_state.selected_task['category'],
                         st.session_state.selected_task['type'],
                         st.session_state.selected_task['task_id'],
-                        [a for a in all_assignees if a != ""] # Pass only actual assignees
+                        [a for a in all_assignees if a != ""], # Pass only actual assignees
+                        assignee_index=df_mgr.assignee_index,
+                        task_index=get_task_index(df_mgr.file_path),
+                        archive=df_mgr.archive
                     )
                     # Store the suggested value in session state
                     st.session_state.suggested_assignee_value = suggested
@@ -251,10 +316,10 @@ with col1:
                 edit_submit = st.form_submit_button("Update Task")
                 if edit_submit:
                     # Update the task in the DataFrame
-                    df.loc[df['task_id'] == selected_task_id, 'due_date'] = pd.to_datetime(new_due_date)
-                    df.loc[df['task_id'] == selected_task_id, 'status'] = new_status
-                    df.loc[df['task_id'] == selected_task_id, 'assignee'] = assigned_to
-                    df.to_csv("task_logs/tasks_data.csv", index=False)
+                    df_mgr.update_task(selected_task_id,
+                                       due_date=pd.to_datetime(new_due_date),
+                                       status=new_status,
+                                       assignee=assigned_to)
                     st.success(f"Task '{st.session_state.selected_task['title']}' updated successfully!")
                     st.session_state.selected_task = None
                     st.rerun()
@@ -0,0 +1,97 @@
+import copy
+from collections import Counter, defaultdict
+from logger_n_exception.logger import logging
+import pandas as pd
+import numpy as np
+
+from feature_engineering.task_features import task_hours_per_day
+
+
+class AssigneeIndex():
+    """
+    Per-assignee aggregates used by suggest_assignee:
+
+    - number of open ("To Do") tasks,
+    - sum / count of their hours per day (for the mean daily load),
+    - completed task counts by (category, type) and by category.
+
+    Built once from the task table and then updated with `remove_tasks` /
+    `add_tasks` for the rows a write touches, so a suggestion only looks up
+    a handful of counters instead of rescanning the table.
+    """
+    def __init__(self):
+        self.open_tasks = Counter()
+        self.open_hours = defaultdict(float)
+        self.open_hours_count = Counter()
+        self.completed = defaultdict(Counter)
+        self.completed_by_category = defaultdict(Counter)
+
+    def __repr__(self):
+        return f"AssigneeIndex(assignees={sorted(self.open_tasks)})"
+
+    @classmethod
+    def from_dataframe(cls, df):
+        index = cls()
+        index.add_tasks(df)
+        logging.info("Assignee index built from %s tasks.", len(df))
+        return index
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    def _update(self, df, sign):
+        if df.empty or 'assignee' not in df:
+            return
+        assigned = df['assignee'].notna()
+
+        to_do = assigned & (df['status'] == 'To Do')
+        for assignee, count in df.loc[to_do, 'assignee'].value_counts().items():
+            self.open_tasks[assignee] += sign * count
+
+        hours_per_day = task_hours_per_day(df)
+        has_hours = to_do & hours_per_day.notna()
+        hours = hours_per_day[has_hours].groupby(df.loc[has_hours, 'assignee'], observed=True).agg(['sum', 'count'])
+        for assignee, row in hours.iterrows():
+            self.open_hours[assignee] += sign * row['sum']
+            self.open_hours_count[assignee] += sign * int(row['count'])
+
+        completed = df[assigned & (df['status'] == 'Completed')]
+        # sort=False keeps first-appearance order, which suggest_assignee uses to break ties
+        sizes = completed.groupby(['category', 'type', 'assignee'], observed=True, sort=False).size()
+        for (category, type_, assignee), count in sizes.items():
+            self.completed[(category, type_)][assignee] += sign * count
+            self.completed_by_category[category][assignee] += sign * count
+
+    def add_tasks(self, df):
+        self._update(df, 1)
+
+    def remove_tasks(self, df):
+        self._update(df, -1)
+
+    def add_completed(self, counts):
+        """Adds (category, type, assignee, count) completed-task counts, e.g. those of the task archive."""
+        for category, type_, assignee, count in counts:
+            self.completed[(category, type_)][assignee] += count
+            self.completed_by_category[category][assignee] += count
+
+    def add_open_task(self, assignee, hours_per_day):
+        """Counts one new open task for `assignee` without building a DataFrame."""
+        self.open_tasks[assignee] += 1
+        if not pd.isna(hours_per_day):
+            self.open_hours[assignee] += hours_per_day
+            self.open_hours_count[assignee] += 1
+
+    def workload(self, assignee):
+        """Number of open tasks of `assignee`."""
+        return self.open_tasks.get(assignee, 0)
+
+    def hours_per_day(self, assignee):
+        """Mean hours per day over the open tasks of `assignee` (0 without any)."""
+        count = self.open_hours_count.get(assignee, 0)
+        return self.open_hours[assignee] / count if count > 0 else 0
+
+    def experts(self, task_category, task_type=None):
+        """Assignees who completed tasks of this category (and type, when given)."""
+        counts = self.completed[(task_category, task_type)] if task_type is not None \
+            else self.completed_by_category[task_category]
+        return [assignee for assignee, count in counts.items() if count > 0]
@@ -0,0 +1,52 @@
+from logger_n_exception.logger import logging
+import pandas as pd
+import numpy as np
+
+from feature_engineering.task_features import task_hours_per_day
+from assigneed_to.assignee_index import AssigneeIndex
+from assigneed_to.suggest_assignee import pick_least_loaded
+
+PRIORITY_ORDER = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+
+
+def assign_backlog(df, assignees, assignee_index=None):
+    """
+    Assigns every unassigned "To Do" task in `df` in one pass.
+
+    Tasks are scheduled most urgent first (priority, then due date). Each one
+    goes to the least loaded expert for its category/type (falling back to
+    category experts, then to everyone) who stays under the hours-per-day
+    threshold, exactly like suggest_assignee, but the workload is updated
+    after every assignment so later tasks see the earlier ones. Tasks nobody
+    has capacity for are left unassigned.
+
+    Returns a {task_id: assignee} dict; `assignee_index` is not modified.
+    """
+    assignees = [a for a in assignees if a]
+    if not assignees:
+        logging.warning("No assignees available for bulk assignment.")
+        return {}
+
+    index = assignee_index.copy() if assignee_index is not None else AssigneeIndex.from_dataframe(df)
+
+    backlog = df[(df['status'] == 'To Do') & df['assignee'].isna()]
+    backlog = backlog.assign(
+        _priority_rank=backlog['priority'].astype(object).map(PRIORITY_ORDER).fillna(len(PRIORITY_ORDER)),
+        _hours_per_day=task_hours_per_day(backlog),
+    ).sort_values(['_priority_rank', 'due_date'], kind='stable')
+
+    assignments = {}
+    for task_id, category, type_, hours_per_day in zip(
+            backlog['task_id'], backlog['category'], backlog['type'], backlog['_hours_per_day']):
+        experts = index.experts(category, type_) or index.experts(category)
+        experts = [a for a in experts if a in assignees]
+
+        best_assignee = pick_least_loaded(experts, index, hours_per_day) \
+            or pick_least_loaded(assignees, index, hours_per_day)
+        if best_assignee is None:
+            continue
+        assignments[task_id] = best_assignee
+        index.add_open_task(best_assignee, hours_per_day)
+
+    logging.info("Bulk assigned %s of %s unassigned tasks.", len(assignments), len(backlog))
+    return assignments
@@ -1,13 +1,63 @@
+from collections import Counter
 from logger_n_exception.logger import logging
 import pandas as pd
 import numpy as np
 
+from feature_engineering.task_features import task_hours_per_day
+from assigneed_to.assignee_index import AssigneeIndex
 
-def suggest_assignee(df, task_category, task_type, task_id, current_assignees_list):
+HOURS_PER_DAY_THRESHOLD = 10 # Example threshold for work hours per day
+# completed tasks at least this similar (cosine) to the new one count as similar work
+SIMILAR_WORK_THRESHOLD = 0.75
+SIMILAR_TASKS_K = 20
+SIMILAR_WORK_CANDIDATES = 3
+
+
+def pick_least_loaded(candidates, assignee_index, estimated_hours_per_day):
+    """Picks the candidate with the fewest open tasks who stays under the daily hours threshold."""
+    min_workload = float('inf')
+    best_assignee = None
+    for assignee in candidates:
+        workload = assignee_index.workload(assignee)
+        workhours_per_day = assignee_index.hours_per_day(assignee)
+        if workload < min_workload:
+            if workhours_per_day + estimated_hours_per_day < HOURS_PER_DAY_THRESHOLD:
+                min_workload = workload
+                best_assignee = assignee
+    return best_assignee
+
+
+def similar_work_assignees(df, task_id, task_index, current_assignees_list, archive=None):
+    """Current assignees who completed the tasks most similar to `task_id`, most similar work first."""
+    similar_ids, scores = task_index.similar_to_task(task_id, SIMILAR_TASKS_K, SIMILAR_WORK_THRESHOLD)
+    if not len(similar_ids):
+        return []
+    score_by_id = dict(zip(similar_ids.tolist(), scores.tolist()))
+    similar = df.loc[df['task_id'].isin(similar_ids), ['task_id', 'status', 'assignee']]
+    if archive is not None:
+        similar = pd.concat([similar, archive.get(set(score_by_id) - set(similar['task_id'].tolist()),
+                                                  ['task_id', 'status', 'assignee'])], ignore_index=True)
+    similar = similar[similar['status'] == 'Completed']
+    totals = Counter()
+    for similar_id, assignee in zip(similar['task_id'].tolist(), similar['assignee'].tolist()):
+        if assignee in current_assignees_list:
+            totals[assignee] += score_by_id[similar_id]
+    return [assignee for assignee, _ in totals.most_common(SIMILAR_WORK_CANDIDATES)]
+
+
+def suggest_assignee(df, task_category, task_type, task_id, current_assignees_list, assignee_index=None,
+                     task_index=None, archive=None):
     """
     Suggests an assignee based on:
-    1. Historical expertise (who handled similar categories/types).
+    1. Historical expertise (who completed the most similar tasks, then who
+       handled the same categories/types).
     2. Current workload (fewer 'To Do' tasks).
+
+    Pass the `assignee_index` maintained by DataFrameManager to avoid
+    rebuilding the workload and expertise aggregates from `df`, and a
+    TaskEmbeddingIndex (nlp/task_index.py) as `task_index` to look for
+    similar completed work, plus the TaskArchive the completed tasks were
+    moved to (DataFrameManager.archive) as `archive`.
     """
     if not current_assignees_list:
         logging.warning("No current assignees available for suggestion.")
@@ -16,63 +66,39 @@ def suggest_assignee(df, task_category, task_type, task_id, current_assignees_li
     if "" in current_assignees_list:
         current_assignees_list.remove("")
 
-    # 1. Calculate current workload for each assignee
-    assignee_workload = df[df['status'] == 'To Do']['assignee'].value_counts().to_dict()
-    # Check all assignee work hours per day work
-    df['expected_days'] = (pd.to_datetime(df['due_date']) - pd.to_datetime(df['created_at'])).dt.days
-    df['hours_per_day'] = df['estimated_hours'] / df['expected_days'].replace(0, np.nan) # Avoid division by zero
-    assignee_hours_per_day = df[df['status'] == 'To Do'].groupby('assignee')['hours_per_day'].mean().to_dict()
-    
-    logging.info(f"Assignee workload: {assignee_workload}")
-    logging.info(f"Assignee hours per day: {assignee_hours_per_day}")
-    
-    for assignee in current_assignees_list:
-        assignee_workload.setdefault(assignee, 0) # Ensure all current assignees are in the dict, even if they have no tasks
-
-    # 2. Find assignees with expertise in the given category/type
-    expert_assignees = []
-    # Find who has completed tasks of this category/type
-    relevant_tasks = df[(df['category'] == task_category) & (df['type'] == task_type) & (df['status'] == 'Completed')]
-    if not relevant_tasks.empty:
-        expert_assignees = relevant_tasks['assignee'].dropna().unique().tolist()
-    
-    logging.info(f"Expert assignees for category '{task_category}' and type '{task_type}': {expert_assignees}")
-    # If no one has completed this specific category/type,
-    # fall back to anyone who has completed this category
-    if not expert_assignees:
-        relevant_tasks = df[(df['category'] == task_category) & (df['status'] == 'Completed')]
-        if not relevant_tasks.empty:
-            expert_assignees = relevant_tasks['assignee'].unique().tolist()
+    if assignee_index is None:
+        assignee_index = AssigneeIndex.from_dataframe(df)
+
+    assignee_workload = {a: assignee_index.workload(a) for a in current_assignees_list}
+    logging.debug("Assignee workload: %s", assignee_workload)
+
+    task = df[df['task_id'] == task_id]
+    if task.empty and archive is not None:
+        task = archive.get([task_id])
+    estimated_hours_per_day = task_hours_per_day(task).values[0]
+
+    # 1. Prefer whoever completed the most similar tasks
+    if task_index is not None:
+        similar_assignees = similar_work_assignees(df, task_id, task_index, current_assignees_list, archive)
+        best_assignee = pick_least_loaded(similar_assignees, assignee_index, estimated_hours_per_day)
+        if best_assignee:
+            logging.info("Best assignee by similar completed work found: %s", best_assignee)
+            return best_assignee
+
+    # 2. Find who has completed tasks of this category/type,
+    # falling back to anyone who has completed this category
+    expert_assignees = assignee_index.experts(task_category, task_type) or assignee_index.experts(task_category)
+    logging.info("Expert assignees for category '%s' and type '%s': %s", task_category, task_type, expert_assignees)
 
     # Filter experts to only include current_assignees_list
     expert_assignees = [a for a in expert_assignees if a in current_assignees_list]
 
-    hours_per_day_threshold = 10 # Example threshold for work hours per day
-    estimated_hours_per_day = df[df['task_id'] == task_id]['hours_per_day'].values[0]
-    if expert_assignees:
-        # Among experts, pick the one with the least workload
-        min_workload = float('inf')
-        best_assignee = None
-        for assignee in expert_assignees:
-            workload = assignee_workload.get(assignee, 0)
-            workhours_per_day = assignee_hours_per_day.get(assignee, 0)
-            if workload < min_workload:
-                if workhours_per_day+estimated_hours_per_day < hours_per_day_threshold:
-                    min_workload = workload
-                    best_assignee = assignee
-        logging.info("Best expert assignee found:", best_assignee[0])
+    # 3. Pick the least loaded expert, then the least loaded assignee overall
+    best_assignee = pick_least_loaded(expert_assignees, assignee_index, estimated_hours_per_day)
+    if best_assignee:
+        logging.info("Best expert assignee found: %s", best_assignee)
         return best_assignee
-    else:
-        # If no expert found, pick the one with the least workload overall
-        min_workload = float('inf')
-        best_assignee = None
-        for assignee in current_assignees_list:
-            workload = assignee_workload.get(assignee, 0)
-            workhours_per_day = assignee_hours_per_day.get(assignee, 0)
-            if workload < min_workload:
-                if workhours_per_day + estimated_hours_per_day < hours_per_day_threshold:
-                    min_workload = workload
-                    best_assignee = assignee
-        logging.info("Best non-expert assignee found:", best_assignee[0])
-        return best_assignee or current_assignees_list[0] # Fallback to first if all workloads are infinite (e.g. empty)
-    
\ No newline at end of file
+
+    best_assignee = pick_least_loaded(current_assignees_list, assignee_index, estimated_hours_per_day)
+    logging.info("Best non-expert assignee found: %s", best_assignee)
+    return best_assignee or current_assignees_list[0] # Fallback to first if nobody has capacity
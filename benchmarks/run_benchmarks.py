@@ -0,0 +1,200 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+from logger_n_exception.logger import logging
+import pandas as pd
+import numpy as np
+
+from benchmarks.synthetic import SIZES, generate_tasks, load_source
+from dataframe_manager.manage_dataframe import DataFrameManager
+from dataframe_manager.storage import get_storage
+from hours_estimatror.estimate_hours import predict_hours, predict_hours_batch
+from priority_prediction.predict_priority import predict_priority, predict_priority_batch
+from assigneed_to.assignee_index import AssigneeIndex
+from assigneed_to.suggest_assignee import suggest_assignee
+from visualization.visualize import VisualizationManager
+
+# a case is flagged when its p50 grows by more than this fraction
+REGRESSION_THRESHOLD = 0.10
+
+
+def measure(fn, repeat, rows=1, warmup=1):
+    """
+    Runs `fn` `warmup` + `repeat` times and returns latency percentiles
+    (ms), throughput (rows / s) and the peak traced memory of one extra run.
+    """
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+
+    # traced separately: tracemalloc slows the timed runs down
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'repeat': repeat,
+        'rows': rows,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p90_ms': float(np.percentile(latencies, 90)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'mean_ms': float(latencies.mean()),
+        'throughput_rows_s': float(rows / (np.median(latencies) / 1000)) if latencies.any() else None,
+        'peak_memory_mb': peak / 1e6,
+    }
+
+
+def _spacy_error():
+    from nlp.nlp import get_spacy_nlp
+    try:
+        get_spacy_nlp()
+    except Exception as e:
+        logging.warning("spaCy unavailable, skipping text benchmarks: %s", e)
+        return str(e)
+    return None
+
+
+def prediction_cases(tasks, repeat, skipped):
+    """Single-task latency and batch throughput of every predictor; unavailable ones go to `skipped`."""
+    one = tasks.iloc[[0]]
+    cases = {
+        'predict_hours/single': (lambda: predict_hours(one), repeat, 1),
+        'predict_priority/single': (lambda: predict_priority(one.assign(estimated_hours=8.0)), repeat, 1),
+        'predict_hours/batch': (lambda: predict_hours_batch(tasks), max(3, repeat // 10), len(tasks)),
+        'predict_priority/batch': (lambda: predict_priority_batch(tasks), max(3, repeat // 10), len(tasks)),
+    }
+    spacy_error = _spacy_error()
+    if spacy_error:
+        skipped.update({'predict_task_info/single': spacy_error, 'predict_task_info/batch': spacy_error})
+    else:
+        from nlp.nlp import predict_task_info, predict_task_info_batch
+        texts = (tasks['title'] + ". " + tasks['description']).tolist()
+        # distinct texts every call, so the cleaned-text cache doesn't hide spaCy
+        counter = iter(range(10 ** 9))
+        cases['predict_task_info/single'] = (lambda: predict_task_info(f"{texts[0]} {next(counter)}"), repeat, 1)
+        cases['predict_task_info/batch'] = (lambda: predict_task_info_batch(texts), max(3, repeat // 10), len(texts))
+    return cases
+
+
+def data_cases(tasks, directory, repeat):
+    """Loads, single-task writes, assignee suggestions and chart rendering on a table of `tasks`."""
+    cases = {}
+    for ext in ['csv', 'parquet']:
+        path = os.path.join(directory, f"tasks_{len(tasks)}.{ext}")
+        get_storage(path).write(tasks)
+        # compaction disabled: the update case measures the change-log append of one create
+        df_mgr = DataFrameManager(path, compact_every=10 ** 9)
+        cases[f'load_dataframe/{ext}'] = (df_mgr.load_dataframe, max(3, repeat // 10), len(tasks))
+
+        new_task = tasks.iloc[[0]].copy()
+        ids = iter(range(len(tasks) + 1, 10 ** 9))
+        cases[f'update_dataframe/{ext}'] = (lambda m=df_mgr, t=new_task: m.update_dataframe(t.assign(task_id=next(ids))),
+                                           repeat, 1)
+
+    df = tasks.copy()
+    assignees = df['assignee'].dropna().unique().tolist()
+    task = df.iloc[0]
+    index = AssigneeIndex.from_dataframe(df)
+    cases['suggest_assignee/indexed'] = (
+        lambda: suggest_assignee(df, task['category'], task['type'], task['task_id'], list(assignees), index), repeat, 1)
+    cases['suggest_assignee/rebuild'] = (
+        lambda: suggest_assignee(df, task['category'], task['type'], task['task_id'], list(assignees)),
+        max(3, repeat // 10), len(df))
+    cases['visualize/tasks_png'] = (lambda: VisualizationManager(df).tasks_png(), max(3, repeat // 10), len(df))
+    cases['visualize/tasks_png_cached'] = (lambda: VisualizationManager(df, cache_key='bench').tasks_png(), repeat, len(df))
+    return cases
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeat=50, only=None):
+    """Runs every case (or those whose name contains one of `only`) for each table size."""
+    source = load_source()
+    results, skipped = {}, {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            tasks = generate_tasks(SIZES[size], source=source)
+            cases = {**prediction_cases(tasks, repeat, skipped), **data_cases(tasks, directory, repeat)}
+            for name, (fn, case_repeat, rows) in cases.items():
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                key = f"{name}@{size}"
+                results[key] = measure(fn, case_repeat, rows)
+                print(f"{key:45s} p50 {results[key]['p50_ms']:10.2f} ms   p99 {results[key]['p99_ms']:10.2f} ms   "
+                      f"peak {results[key]['peak_memory_mb']:8.1f} MB", flush=True)
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': pd.Timestamp.now().isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+        },
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Returns (name, baseline p50, current p50, change) for every case, regressions first."""
+    rows = []
+    for name, result in current['results'].items():
+        if name in baseline['results']:
+            before, after = baseline['results'][name]['p50_ms'], result['p50_ms']
+            rows.append((name, before, after, after / before - 1 if before else 0.0))
+    return sorted(rows, key=lambda row: row[3] <= threshold)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the prediction and data paths.")
+    parser.add_argument("--sizes", default="1k,100k", help=f"comma separated table sizes out of {list(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=50, help="timed runs of single-task cases")
+    parser.add_argument("--only", help="comma separated substrings of the case names to run")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="p50 increase flagged as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        rows = compare(baseline, current, args.threshold)
+        for name, before, after, change in rows:
+            flag = "REGRESSION" if change > args.threshold else ""
+            print(f"{name:45s} {before:10.2f} -> {after:10.2f} ms  {change:+7.1%}  {flag}")
+        sys.exit(1 if any(change > args.threshold for *_, change in rows) else 0)
+
+    sizes = [size.strip() for size in args.sizes.split(',')]
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        parser.error(f"unknown sizes {sorted(unknown)}, choose from {list(SIZES)}")
+    results = run(sizes, args.repeat, args.only.split(',') if args.only else None)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,54 @@
+import pandas as pd
+import numpy as np
+
+from dataframe_manager.storage import TASK_COLUMNS
+
+# source of the titles / descriptions and of the column distributions
+SOURCE_PATH = 'task_logs/synthetic_task_dataset_trans.csv'
+SIZES = {'1k': 1_000, '100k': 100_000, '1M': 1_000_000}
+
+
+def load_source(source_path=SOURCE_PATH):
+    source = pd.read_csv(source_path)
+    for col in ['created_at', 'due_date']:
+        source[col] = pd.to_datetime(source[col], dayfirst=True)
+    return source
+
+
+def generate_tasks(n_rows, seed=0, source=None):
+    """
+    Synthetic task table of `n_rows` shaped like task_logs/synthetic_task_dataset*.csv.
+
+    Categorical columns, estimated hours and due-date offsets are drawn from
+    the empirical distributions of the source file; titles / descriptions are
+    sampled from it and suffixed with the task_id so that texts differ. Built
+    column-wise, so 1M rows take a few seconds.
+    """
+    source = load_source() if source is None else source
+    rng = np.random.default_rng(seed)
+
+    def sample(col):
+        counts = source[col].value_counts(normalize=True, dropna=False)
+        return rng.choice(counts.index.to_numpy(dtype=object), size=n_rows, p=counts.to_numpy())
+
+    task_id = np.arange(1, n_rows + 1)
+    rows = rng.integers(0, len(source), size=n_rows)
+    start, end = source['created_at'].min(), source['created_at'].max()
+    created_at = start + pd.to_timedelta(rng.uniform(0, (end - start).total_seconds(), n_rows).astype(np.int64), unit='s')
+    expected_days = ((source['due_date'] - source['created_at']).dt.days).to_numpy()[rng.integers(0, len(source), n_rows)]
+
+    suffix = pd.Series(task_id).astype(str).radd(" #")
+    tasks = pd.DataFrame({
+        'task_id': task_id,
+        'title': source['title'].to_numpy()[rows] + suffix.to_numpy(),
+        'created_at': created_at.floor('min'),
+        'due_date': (created_at + pd.to_timedelta(expected_days, unit='D')).floor('min'),
+        'status': sample('status'),
+        'description': source['description'].to_numpy()[rows],
+        'category': sample('category'),
+        'type': sample('type'),
+        'priority': sample('priority'),
+        'estimated_hours': source['estimated_hours'].to_numpy()[rng.integers(0, len(source), n_rows)],
+        'assignee': sample('assignee'),
+    })
+    return tasks[TASK_COLUMNS]
@@ -0,0 +1,213 @@
+import os
+import json
+import argparse
+from functools import lru_cache
+from collections import Counter
+from logger_n_exception.logger import logging
+from logger_n_exception.metrics import timed
+import pandas as pd
+import numpy as np
+
+from dataframe_manager.storage import get_storage, task_filter_mask
+from dataframe_manager.change_log import FileLock
+
+# tasks with this status leave the working table when it is compacted
+ARCHIVED_STATUS = 'Completed'
+UNDATED_PARTITION = 'undated'
+# archive query results kept per process; keyed by the summary file, so any archive change invalidates them
+QUERY_CACHE_SIZE = 8
+
+
+def partition_keys(df):
+    """Archive partition of every row of `df`: the month of its created_at (YYYY-MM)."""
+    created_at = pd.to_datetime(df['created_at'], errors='coerce')
+    return created_at.dt.strftime('%Y-%m').fillna(UNDATED_PARTITION)
+
+
+def _expertise(df):
+    """Completed task counts by (category, type, assignee), like AssigneeIndex counts them."""
+    if df.empty or 'assignee' not in df:
+        return Counter()
+    completed = df[df['assignee'].notna() & (df['status'] == ARCHIVED_STATUS)]
+    return Counter(completed.groupby(['category', 'type', 'assignee'], observed=True, sort=False).size().to_dict())
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _cached_read(base_path, extension, signature, filters, search, columns):
+    return TaskArchive(base_path, extension).read(dict(filters), search, list(columns) if columns else None)
+
+
+class TaskArchive():
+    """
+    Completed tasks moved out of the working table, one file per month of
+    created_at in `{base}_archive/` (CSV, or Parquet next to a Parquet table).
+
+    summary.json keeps each partition's row count and task_id range, the
+    largest archived task_id and the completed-task counts by (category,
+    type, assignee), so id allocation and suggest_assignee's expertise
+    lookup don't need the partitions. Those are only read by queries that
+    ask for completed tasks.
+    """
+    def __init__(self, base_path, extension='.csv'):
+        self.base_path = base_path
+        self.dir_path = f"{base_path}_archive"
+        self.summary_path = os.path.join(self.dir_path, 'summary.json')
+        self.extension = extension
+        self.lock = FileLock(os.path.join(self.dir_path, 'archive.lock'))
+        self._summary = None
+        self._summary_signature = None
+
+    def __repr__(self):
+        return f"TaskArchive(dir_path={self.dir_path}, partitions={len(self.partitions())}, tasks={len(self)})"
+
+    def __len__(self):
+        return sum(partition['rows'] for partition in self.summary()['partitions'].values())
+
+    def summary(self):
+        """The archive summary, re-read when another process changed it."""
+        try:
+            stat = os.stat(self.summary_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return {'partitions': {}, 'max_task_id': 0, 'completed': []}
+        if signature != self._summary_signature:
+            with open(self.summary_path, 'r', encoding='utf-8') as f:
+                self._summary = json.load(f)
+            self._summary_signature = signature
+        return self._summary
+
+    def _write_summary(self, summary):
+        tmp_path = f"{self.summary_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f)
+        os.replace(tmp_path, self.summary_path)
+
+    def partitions(self):
+        return sorted(self.summary()['partitions'])
+
+    def _storage(self, partition):
+        return get_storage(os.path.join(self.dir_path, f"{partition}{self.extension}"))
+
+    def max_task_id(self):
+        return self.summary()['max_task_id']
+
+    def expertise(self):
+        """(category, type, assignee, count) of the archived completed tasks."""
+        return [tuple(row) for row in self.summary()['completed']]
+
+    def _partitions_with(self, task_ids):
+        """Partitions whose task_id range covers any of `task_ids`."""
+        task_ids = np.asarray(list(task_ids), dtype=np.int64)
+        return [name for name, partition in sorted(self.summary()['partitions'].items())
+                if ((task_ids >= partition['min_task_id']) & (task_ids <= partition['max_task_id'])).any()]
+
+    @timed('archive_read')
+    def read(self, filters=None, search=None, columns=None):
+        """The archived tasks matching `filters` / `search` (see DataFrameManager.filter_tasks)."""
+        status = (filters or {}).get('status', ARCHIVED_STATUS)
+        read_columns = None
+        if columns:
+            read_columns = list(dict.fromkeys(list(columns) + list(filters or {}) +
+                                              (['title', 'description'] if search else [])))
+        frames = []
+        if status == ARCHIVED_STATUS:
+            for partition in self.partitions():
+                df = self._storage(partition).read(columns=read_columns)
+                frames.append(df[task_filter_mask(df, filters, search)])
+        if not frames:
+            return pd.DataFrame(columns=columns or [])
+        df = pd.concat(frames, ignore_index=True)
+        return df[columns] if columns else df
+
+    def query(self, filters=None, search=None, columns=None):
+        """`read`, answered from the process-wide cache while the archive is unchanged (treat as read-only)."""
+        try:
+            stat = os.stat(self.summary_path)
+        except FileNotFoundError:
+            return self.read(filters, search, columns)
+        return _cached_read(self.base_path, self.extension, (stat.st_mtime_ns, stat.st_size),
+                            tuple(sorted((filters or {}).items(), key=lambda item: item[0])), search or None,
+                            tuple(columns) if columns else None)
+
+    def read_chunks(self, chunk_size, columns=None):
+        for partition in self.partitions():
+            yield from self._storage(partition).read_chunks(chunk_size, columns)
+
+    def get(self, task_ids, columns=None):
+        """The archived tasks among `task_ids`, only reading the partitions whose id range covers them."""
+        task_ids = set(task_ids)
+        frames = []
+        for partition in self._partitions_with(task_ids):
+            df = self._storage(partition).read(columns=columns)
+            frames.append(df[df['task_id'].isin(task_ids)])
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns or ['task_id'])
+
+    def task_ids(self):
+        ids = [chunk['task_id'].to_numpy(dtype=np.int64) for chunk in self.read_chunks(10 ** 6, ['task_id'])]
+        return np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+
+    def _update_partition(self, summary, partition, df):
+        storage = self._storage(partition)
+        if df.empty:
+            if storage.exists():
+                os.remove(storage.file_path)
+            summary['partitions'].pop(partition, None)
+            return
+        storage.write(df)
+        summary['partitions'][partition] = {'rows': len(df), 'min_task_id': int(df['task_id'].min()),
+                                            'max_task_id': int(df['task_id'].max())}
+
+    def _change(self, add=None, remove_ids=()):
+        """Adds the rows of `add` and removes `remove_ids` partition by partition; returns the removed rows."""
+        os.makedirs(self.dir_path, exist_ok=True)
+        with self.lock:
+            summary = json.loads(json.dumps(self.summary()))
+            expertise = Counter({tuple(row[:3]): row[3] for row in summary['completed']})
+            remove_ids = set(remove_ids)
+            added = {} if add is None else dict(list(add.groupby(partition_keys(add).to_numpy(), sort=False)))
+            removed = []
+            for partition in set(added) | set(self._partitions_with(remove_ids)):
+                storage = self._storage(partition)
+                existing = storage.read() if storage.exists() else pd.DataFrame(columns=['task_id'])
+                new_rows = added.get(partition)
+                drop = existing['task_id'].isin(remove_ids)
+                if new_rows is not None:
+                    # archiving a task again replaces its row
+                    drop |= existing['task_id'].isin(new_rows['task_id'])
+                    expertise.update(_expertise(new_rows))
+                removed.append(existing[existing['task_id'].isin(remove_ids)])
+                expertise.subtract(_expertise(existing[drop]))
+                frames = [frame for frame in [existing[~drop], new_rows] if frame is not None and len(frame)]
+                self._update_partition(summary, partition, pd.concat(frames, ignore_index=True)
+                                       if frames else existing.iloc[:0])
+            if add is not None and len(add):
+                summary['max_task_id'] = max(summary['max_task_id'], int(add['task_id'].max()))
+            summary['completed'] = [[*key, int(count)] for key, count in expertise.items() if count > 0]
+            self._write_summary(summary)
+        removed = [frame for frame in removed if len(frame)]
+        return pd.concat(removed, ignore_index=True) if removed else pd.DataFrame(columns=['task_id'])
+
+    @timed('archive_add')
+    def add(self, df):
+        """Moves the rows of `df` into their monthly partitions."""
+        if df.empty:
+            return
+        self._change(add=df)
+        logging.info("Archived %s tasks into %s", len(df), self.dir_path)
+
+    def remove(self, task_ids):
+        """Takes `task_ids` out of the archive (e.g. to edit them again) and returns their rows."""
+        removed = self._change(remove_ids=task_ids)
+        logging.info("Restored %s archived tasks from %s", len(removed), self.dir_path)
+        return removed
+
+
+if __name__ == "__main__":
+    from dataframe_manager.manage_dataframe import DataFrameManager, DATASET_PATH
+
+    parser = argparse.ArgumentParser(description="Compact the task table, moving completed tasks into the archive.")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="task table (CSV / Parquet)")
+    args = parser.parse_args()
+    df_mgr = DataFrameManager(args.dataset, archive=True)
+    df_mgr.compact()
+    print(df_mgr.archive)
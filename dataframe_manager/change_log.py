@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from logger_n_exception.logger import logging
+from logger_n_exception.metrics import timed
+import pandas as pd
+import numpy as np
+
+from dataframe_manager.storage import DATE_COLUMNS, set_task_fields
+
+EVENT_OPS = ('create', 'update', 'complete')
+
+
+class FileLock():
+    """
+    Cross-process lock held as an OS lock on a lock file (fcntl.flock, or
+    msvcrt.locking on Windows).
+
+    The kernel releases it when its owner exits or crashes, so it is never
+    broken while held, however long a compaction takes. The lock file itself
+    stays in place.
+    """
+    def __init__(self, lock_path, timeout=10):
+        self.lock_path = lock_path
+        self.timeout = timeout
+        # one descriptor per thread, so a lock shared by threads excludes them from each other too
+        self._local = threading.local()
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR)
+        while True:
+            try:
+                _lock_fd(fd)
+                self._local.fd = fd
+                return self
+            except OSError:
+                if time.monotonic() > deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"Could not acquire lock {self.lock_path}")
+                time.sleep(0.01)
+
+    def __exit__(self, *exc):
+        fd = self._local.fd
+        self._local.fd = None
+        try:
+            _unlock_fd(fd)
+        finally:
+            os.close(fd)
+
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock_fd(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+
+    def _unlock_fd(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _to_json_value(value):
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return None
+    return value
+
+
+def _from_json_fields(fields):
+    fields = {col: (np.nan if value is None else value) for col, value in fields.items()}
+    for col in DATE_COLUMNS:
+        if col in fields:
+            fields[col] = pd.to_datetime(fields[col], errors='coerce')
+    return fields
+
+
+def make_event(op, task_id, fields=None):
+    if op not in EVENT_OPS:
+        raise ValueError(f"Unknown change log operation: {op}")
+    return {
+        'op': op,
+        'task_id': int(task_id),
+        'fields': {col: _to_json_value(value) for col, value in (fields or {}).items()},
+        'ts': datetime.now().isoformat(),
+    }
+
+
+class ChangeLog():
+    """
+    Append-only JSON-lines log of task events (create / update / complete).
+
+    Every write appends whole lines under a `FileLock`, so single-task changes
+    cost O(1) I/O and concurrent writers never overwrite each other.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock_path = f"{file_path}.lock"
+
+    def __repr__(self):
+        return f"ChangeLog(file_path={self.file_path})"
+
+    def lock(self):
+        return FileLock(self.lock_path)
+
+    @timed('change_log_append')
+    def append(self, events, locked=False):
+        """
+        Appends `events`; pass locked=True when the caller already holds
+        `lock()`. Returns the (start, end) byte offsets of the appended lines.
+        """
+        payload = "".join(json.dumps(event) + "\n" for event in events).encode('utf-8')
+        if not payload:
+            return None
+        if locked:
+            return self._write(payload)
+        with self.lock():
+            return self._write(payload)
+
+    def _write(self, payload):
+        with open(self.file_path, 'ab') as f:
+            start = f.tell()
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+            return start, f.tell()
+
+    def size(self):
+        try:
+            return os.path.getsize(self.file_path)
+        except FileNotFoundError:
+            return 0
+
+    @timed('change_log_read')
+    def read(self):
+        """Returns all complete events in append order."""
+        return self.read_from(0)[0]
+
+    def read_from(self, offset):
+        """
+        The complete events appended at or after byte `offset`, and the
+        offset to read the next ones from. A last line still being written
+        is left for the next read.
+        """
+        events = []
+        try:
+            f = open(self.file_path, 'rb')
+        except FileNotFoundError:
+            return events, offset
+        with f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logging.warning("Skipping unreadable change log line in %s", self.file_path)
+        return events, offset
+
+    def truncate(self):
+        open(self.file_path, 'w').close()
+
+
+def apply_events(df, events):
+    """Replays change log events onto `df` (last write wins) and returns the result."""
+    if not events:
+        return df
+
+    # rows of the tasks the events touch, found with one vectorized lookup instead of indexing the whole table
+    task_ids = {event['task_id'] for event in events}
+    matches = df.loc[df['task_id'].isin(task_ids), 'task_id'] if 'task_id' in df else pd.Series(dtype=np.int64)
+    existing = set(matches.tolist())
+    new_rows = {}
+    updates = {}
+    for event in events:
+        task_id = event['task_id']
+        fields = _from_json_fields(event.get('fields', {}))
+        if event['op'] == 'complete':
+            fields['status'] = 'Completed'
+
+        if task_id in new_rows:
+            new_rows[task_id].update(fields)
+        elif event['op'] == 'create' and task_id not in existing:
+            new_rows[task_id] = dict(fields, task_id=task_id)
+        else:
+            updates.setdefault(task_id, {}).update(fields)
+
+    if updates:
+        labels = pd.Series(matches.index, index=matches.to_numpy())
+        for task_id, fields in updates.items():
+            if task_id in labels.index:
+                set_task_fields(df, labels[task_id], fields)
+
+    if new_rows:
+        df = pd.concat([df, pd.DataFrame(list(new_rows.values()))], ignore_index=True)
+    return df
@@ -1,41 +1,622 @@
 import os
+import threading
+from contextlib import nullcontext
 from logger_n_exception.logger import logging
+from logger_n_exception.metrics import timed
 import pandas as pd
 import numpy as np
 
-DATASET_PATH = 'task_logs/tasks_data.csv'
+from dataframe_manager.storage import (TASK_COLUMNS, ParquetStorage, get_storage, coerce_task_dtypes,
+                                       compact_task_dtypes, task_filter_mask)
+from dataframe_manager.change_log import ChangeLog, make_event, apply_events
+from dataframe_manager.archive import TaskArchive, ARCHIVED_STATUS
+from assigneed_to.assignee_index import AssigneeIndex
+
+# point TASKS_DATA_PATH at a .parquet file to use the columnar backend
+DATASET_PATH = os.environ.get('TASKS_DATA_PATH', 'task_logs/tasks_data.csv')
+# number of logged events after which the log is folded into the base file
+COMPACT_EVERY = 500
+# task list paging: rows per page and the columns a page can be ordered by
+PAGE_SIZE = 50
+SORT_COLUMNS = ['task_id', 'created_at', 'due_date']
+# move completed tasks out of the working table into monthly archive files on compaction
+ARCHIVE_COMPLETED = os.environ.get('TASKS_ARCHIVE', 'true').lower() != 'false'
+# embed created / imported tasks into the similar-task index (nlp/task_index.py) right away
+INDEX_NEW_TASKS = os.environ.get('TASKS_INDEX', 'true').lower() != 'false'
+
+# process-wide task table snapshots shared (read-only) by every session
+_SNAPSHOTS = {}
+_SNAPSHOT_LOCK = threading.RLock()
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except FileNotFoundError:
+        return None
+
 
 class DataFrameManager():
-    def __init__(self, file_path=DATASET_PATH):
+    """
+    Task table = base file (CSV / Parquet) + append-only change log.
+
+    Creates, updates and completions append one event to the change log
+    instead of rewriting the table; the log is replayed on load and compacted
+    into the base file every `compact_every` events. Backends with row-level
+    writes (SQLite) receive the events directly and need no log.
+
+    With `shared=True` all managers of the same table in this process share
+    one versioned snapshot: it is only reloaded when the files change on
+    disk, and writes through any manager replace it and bump `version`.
+    Treat the shared DataFrame as read-only and write through the manager.
+
+    With `compact_dtypes=True` status, category, type, priority and assignee
+    are held as categoricals and task_id / estimated_hours as narrow numeric
+    dtypes; `memory_footprint()` reports the resulting size.
+
+    With `archive=True` (CSV / Parquet tables) compaction moves completed
+    tasks into a TaskArchive, so the loaded table only holds open work.
+    Filtering / paging on status "Completed" (or with include_archive=True),
+    get_task and the expertise counts of `assignee_index` also cover the
+    archive; editing an archived task moves it back into the table.
+    """
+    def __init__(self, file_path=DATASET_PATH, storage=None, columns=None, log_path=None,
+                 compact_every=COMPACT_EVERY, shared=False, compact_dtypes=False, archive=ARCHIVE_COMPLETED,
+                 index_tasks=INDEX_NEW_TASKS):
         self.file_path = file_path
-        self.df = self.load_dataframe()
-        logging.info(f"DataFrame loaded from {self.file_path}")
+        self.storage = storage or get_storage(file_path)
+        self.change_log = ChangeLog(log_path or f"{os.path.splitext(file_path)[0]}_changes.jsonl")
+        self.compact_every = compact_every
+        # a column projection is read-only: saving it would drop the other columns
+        self.columns = columns
+        self.pending_events = 0
+        self.shared = shared
+        self.compact_dtypes = compact_dtypes
+        self.index_tasks = index_tasks
+        self.version = 0
+        self._assignee_index = None
+        self._task_positions = None
+        self._archive_cache = (None, None)
+        self.archive = None
+        if archive and not self._row_writes:
+            extension = '.parquet' if isinstance(self.storage, ParquetStorage) else '.csv'
+            self.archive = TaskArchive(os.path.splitext(file_path)[0], extension)
+        self.df = self._load_shared() if shared else self.load_dataframe()
 
     def __repr__(self):
-        return f"DataFrameManager(file_path={self.file_path})"
-    
+        return f"DataFrameManager(file_path={self.file_path}, storage={self.storage!r})"
+
     def __str__(self):
         return f"DataFrameManager managing DataFrame with {len(self.df)} rows and {len(self.df.columns)} columns."
 
+    def _read_base(self):
+        if self.storage.exists():
+            return self.storage.read(columns=self.columns)
+        logging.error("File %s does not exist. Returning empty DataFrame.", self.file_path)
+        return pd.DataFrame()
+
+    @property
+    def _row_writes(self):
+        return getattr(self.storage, 'supports_row_writes', False)
+
+    def _snapshot_key(self):
+        return (os.path.abspath(self.file_path), os.path.abspath(self.change_log.file_path),
+                tuple(self.columns) if self.columns is not None else None, self.compact_dtypes,
+                self.archive is not None)
+
+    def _signature(self):
+        """Signature of the files other than the change log, which is followed by `_log_offset` instead."""
+        paths = [self.file_path, f"{self.file_path}-wal"]
+        if self.archive is not None:
+            paths.append(self.archive.summary_path)
+        return tuple(_file_signature(path) for path in paths)
+
+    def _load_shared(self):
+        with _SNAPSHOT_LOCK:
+            snapshot = _SNAPSHOTS.get(self._snapshot_key())
+            if snapshot is None:
+                self.df = self.load_dataframe()
+                self._publish()
+                return self.df
+            self.df = snapshot['df']
+            self.version = snapshot['version']
+            self._loaded_signature = snapshot['signature']
+            self._log_offset = snapshot['log_offset']
+            self.pending_events = snapshot['pending_events']
+            self._assignee_index = snapshot['assignee_index']
+            if self._sync():
+                self._publish()
+            return self.df
+
+    def _publish(self):
+        """Replaces the shared snapshot with this manager's table after a write."""
+        if not self.shared:
+            return
+        with _SNAPSHOT_LOCK:
+            snapshot = _SNAPSHOTS.get(self._snapshot_key())
+            self.version = max(self.version, snapshot['version'] if snapshot else 0) + 1
+            _SNAPSHOTS[self._snapshot_key()] = {
+                'df': self.df,
+                'version': self.version,
+                'signature': self._loaded_signature,
+                'log_offset': self._log_offset,
+                'pending_events': self.pending_events,
+                'assignee_index': self._assignee_index,
+            }
+
     def load_dataframe(self):
-        if os.path.exists(self.file_path):
-            return pd.read_csv(self.file_path)
-        else:
-            logging.error(f"File {self.file_path} does not exist. Returning empty DataFrame.")
-            return pd.DataFrame()
+        # taken before reading, so a write racing the read shows up as a changed signature
+        self._loaded_signature = self._signature()
+        self._log_offset = 0
+        df = self._read_base()
+        if not self._row_writes:
+            events, self._log_offset = self.change_log.read_from(0)
+            self.pending_events = len(events)
+            df = apply_events(df, events)
+            if self.columns is not None:
+                df = df[[col for col in self.columns if col in df]]
+        df = self._apply_dtypes(df)
+        # the deep footprint walks every string, so only when it is logged (never on a snapshot hit)
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info("DataFrame loaded from %s (%.1f MB in memory)", self.file_path,
+                         df.memory_usage(deep=True).sum() / 1e6)
+        return df
+
+    def _sync(self):
+        """
+        Brings the table up to date with the files, returning whether it
+        changed: when only the change log grew just the new events are
+        applied, otherwise everything is re-read.
+        """
+        signature = self._signature()
+        if signature == self._loaded_signature:
+            log_size = 0 if self._row_writes else self.change_log.size()
+            if log_size == self._log_offset:
+                return False
+            if log_size > self._log_offset:
+                events, offset = self.change_log.read_from(self._log_offset)
+                # unless a compaction rewrote the base file and the log meanwhile
+                if self._signature() == signature:
+                    if not events:
+                        return False  # only a line still being written
+                    self._log_offset = offset
+                    self.pending_events += len(events)
+                    self._apply(events)
+                    return True
+        self.df = self.load_dataframe()
+        self._assignee_index = None
+        return True
+
+    def _apply_dtypes(self, df):
+        return compact_task_dtypes(df) if self.compact_dtypes else df
+
+    def memory_footprint(self):
+        """Bytes held by the loaded table, including string contents."""
+        return int(self.df.memory_usage(deep=True).sum())
 
     def save_dataframe(self):
-        self.df.to_csv(self.file_path, index=False)
-        logging.info(f'DataFrame saved to {self.file_path}')
+        """Folds the change log into the base file (alias of `compact`)."""
+        self.compact()
+
+    @timed('compact')
+    def compact(self):
+        """
+        Rewrites the base file with all logged events applied and empties the
+        log; with an archive, completed tasks move there instead.
+        """
+        if self.columns is not None:
+            raise ValueError("Cannot save a DataFrame loaded with a column projection")
+        if self._row_writes:
+            return
+        with self._write_lock(), self.change_log.lock():
+            # re-read under the lock so events from other sessions are kept
+            df = apply_events(self._read_base(), self.change_log.read())
+            if self.archive is not None and 'status' in df:
+                completed = (df['status'] == ARCHIVED_STATUS).to_numpy()
+                # archived before the base is rewritten: a crash in between leaves a copy, not a loss
+                self.archive.add(df[completed])
+                df = df[~completed].reset_index(drop=True)
+            self.df = self._apply_dtypes(df)
+            self.storage.write(self.df)
+            self.change_log.truncate()
+            self._loaded_signature = self._signature()
+            self._log_offset = 0
+            self.pending_events = 0
+            self._assignee_index = None  # rebuilt lazily from the re-read table
+            self._publish()
+        logging.info("DataFrame compacted and saved to %s", self.file_path)
 
     def get_dataframe(self):
         return self.df
 
+    def refresh(self):
+        """
+        Picks up writes made through other managers (shared mode only): new
+        change-log events are applied, other file changes re-read the table.
+        """
+        if self.shared:
+            self.df = self._load_shared()
+        return self.df
+
+    def _catch_up(self):
+        """
+        Picks up writes other processes made since the table was loaded,
+        shared or not; called under the change-log lock before allocating
+        task_ids.
+        """
+        if self.shared:
+            return self.refresh()
+        self._sync()
+        return self.df
+
+    @property
+    def assignee_index(self):
+        """Workload / expertise aggregates for suggest_assignee, kept current on every write."""
+        if self._assignee_index is None:
+            self._assignee_index = AssigneeIndex.from_dataframe(self.df)
+            if self.archive is not None:
+                self._assignee_index.add_completed(self.archive.expertise())
+            if self.shared:
+                with _SNAPSHOT_LOCK:
+                    snapshot = _SNAPSHOTS.get(self._snapshot_key())
+                    if snapshot is not None and snapshot['df'] is self.df:
+                        snapshot['assignee_index'] = self._assignee_index
+        return self._assignee_index
+
+    def _write_lock(self):
+        # always taken before the change-log file lock, never after it
+        return _SNAPSHOT_LOCK if self.shared else nullcontext()
+
+    def _log(self, events):
+        if self.columns is not None:
+            raise ValueError("Cannot write through a DataFrame loaded with a column projection")
+        with self._write_lock():
+            # start from the latest snapshot so other sessions' writes are kept
+            self.refresh()
+            self._write_events(events)
+
+    def _writable_copy(self, events):
+        """
+        Copy-on-write for the shared snapshot other sessions may be reading:
+        a shallow copy of the table in which only the columns `events` set
+        get their own arrays, so a single-field update copies one column.
+        """
+        touched = {'status'} if any(event['op'] == 'complete' for event in events) else set()
+        for event in events:
+            touched.update(event.get('fields', {}))
+        df = self.df.copy(deep=False)
+        for col in touched:
+            if col in df:
+                df[col] = df[col].copy()
+        return df
+
+    def _apply(self, events):
+        """Replays `events` onto the table, keeping the assignee index current."""
+        df = self._writable_copy(events) if self.shared else self.df
+        task_ids = {event['task_id'] for event in events}
+        before = df[df['task_id'].isin(task_ids)] if self._assignee_index is not None and 'task_id' in df else None
+
+        df = apply_events(df, events)
+        if self.columns is not None:
+            df = df[[col for col in self.columns if col in df]]
+        # appended rows arrive as plain object / int64 columns
+        self.df = self._apply_dtypes(df)
+
+        if before is not None:
+            index = self._assignee_index.copy() if self.shared else self._assignee_index
+            index.remove_tasks(before)
+            index.add_tasks(self.df[self.df['task_id'].isin(task_ids)])
+            self._assignee_index = index
+
+    def _write_events(self, events, locked=False):
+        if self._row_writes:
+            self.storage.apply_events(events)
+            self._loaded_signature = self._signature()
+        else:
+            offsets = self.change_log.append(events, locked=locked)
+            self.pending_events += len(events)
+            # events other processes appended before ours are picked up (again with ours) on refresh
+            if offsets and offsets[0] == self._log_offset:
+                self._log_offset = offsets[1]
+        self._apply(events)
+
+        if self.pending_events >= self.compact_every and not locked:
+            self.compact()
+        else:
+            self._publish()
+
     def update_dataframe(self, new_data):
+        """Creates (or overwrites, by task_id) the tasks in `new_data`."""
         if isinstance(new_data, pd.DataFrame):
-            self.df = pd.concat([self.df, new_data], ignore_index=True)
-            self.df.drop_duplicates(inplace=True)
-            logging.info(f"DataFrame updated with new data. Current size: {len(self.df)} rows.")
+            new_data = coerce_task_dtypes(new_data.copy())
+            events = [make_event('create', row['task_id'], row) for row in new_data.to_dict('records')]
+            self._log(events)
+            logging.info("DataFrame updated with new data. Current size: %s rows.", len(self.df))
         else:
             raise ValueError("New data must be a pandas DataFrame")
-        self.save_dataframe()
\ No newline at end of file
+
+    @timed('create_tasks')
+    def create_tasks(self, new_data):
+        """
+        Creates the tasks in `new_data` under new task_ids (following the
+        current maximum) and returns the ids. The ids are allocated under the
+        change-log lock, so concurrent processes never hand out the same one.
+        """
+        if not isinstance(new_data, pd.DataFrame):
+            raise ValueError("New data must be a pandas DataFrame")
+        if self.columns is not None:
+            raise ValueError("Cannot write through a DataFrame loaded with a column projection")
+        with self._write_lock():
+            with self.change_log.lock():
+                df = self._catch_up()
+                start = max(int(df['task_id'].max()) if len(df) else 0, self._archived_max_task_id()) + 1
+                new_data = coerce_task_dtypes(new_data.copy()).assign(task_id=range(start, start + len(new_data)))
+                self._write_events([make_event('create', row['task_id'], row) for row in new_data.to_dict('records')],
+                                   locked=True)
+            if self.pending_events >= self.compact_every:
+                self.compact()
+        logging.info("Created %s tasks from task_id %s.", len(new_data), start)
+        self._index_new_tasks(new_data)
+        return new_data['task_id'].tolist()
+
+    @timed('append_tasks')
+    def append_tasks(self, new_data):
+        """
+        Appends the rows of `new_data` straight to the base file, for bulk
+        imports: rows whose task_id is already taken (or repeated) are skipped
+        and rows without one get new task_ids after the current maximum.
+        Returns the task_ids written.
+
+        Needs a backend that can append rows (CSV, SQLite). Unlike the other
+        writes this also works on a column projection (e.g. columns=['task_id']),
+        as only the new rows are written.
+        """
+        if not isinstance(new_data, pd.DataFrame):
+            raise ValueError("New data must be a pandas DataFrame")
+        if not hasattr(self.storage, 'append'):
+            raise ValueError(f"{self.storage!r} cannot append rows; import into a CSV or SQLite table and migrate")
+        with self._write_lock(), self.change_log.lock():
+            # pick up tasks other processes created since the table was loaded
+            self._catch_up()
+            taken = self.df['task_id'] if 'task_id' in self.df else pd.Series(dtype=np.int64)
+            if self.archive is not None and len(self.archive):
+                taken = pd.Series(np.concatenate([taken.to_numpy(dtype=np.int64), self.archive.task_ids()]))
+
+            new_data = coerce_task_dtypes(new_data.copy())
+            task_ids = pd.to_numeric(new_data['task_id'], errors='coerce') if 'task_id' in new_data \
+                else pd.Series(np.nan, index=new_data.index)
+            new_data = new_data[task_ids.isna() | ~(task_ids.isin(taken) | task_ids.duplicated())]
+            task_ids = task_ids[new_data.index]
+            start = int(max(taken.max() if len(taken) else 0, task_ids.max() if task_ids.notna().any() else 0)) + 1
+            task_ids[task_ids.isna()] = np.arange(start, start + int(task_ids.isna().sum()))
+            new_data = new_data.assign(task_id=task_ids.astype(np.int64))
+            if new_data.empty:
+                return []
+
+            self.storage.append(new_data)
+            self._loaded_signature = self._signature()
+            self.df = self._apply_dtypes(pd.concat(
+                [self.df, new_data[[col for col in self.df.columns if col in new_data] or ['task_id']]],
+                ignore_index=True))
+            if self._assignee_index is not None:
+                index = self._assignee_index.copy() if self.shared else self._assignee_index
+                index.add_tasks(new_data)
+                self._assignee_index = index
+            self._publish()
+        logging.info("Appended %s tasks to %s", len(new_data), self.file_path)
+        self._index_new_tasks(new_data)
+        return new_data['task_id'].tolist()
+
+    def _index_new_tasks(self, new_data):
+        """Appends created tasks to the similar-task index (outside the write locks)."""
+        if not self.index_tasks or new_data.empty or 'title' not in new_data:
+            return
+        from nlp.task_index import get_task_index  # imports this module
+        try:
+            get_task_index(self.file_path).add_tasks(new_data)
+        except Exception:
+            # the index is a hint only, `python -m nlp.task_index` catches up on missed tasks
+            logging.exception("Could not index tasks %s", new_data['task_id'].tolist()[:10])
+
+    def iter_chunks(self, chunk_size, columns=None, include_archive=True):
+        """
+        Streams the table (base file with the change log applied) as
+        DataFrames of up to `chunk_size` rows, without loading it whole.
+        Tasks only created in the change log come next, then the archive.
+        """
+        logged = [] if self._row_writes else self.change_log.read()
+        events = {}
+        for event in logged:
+            events.setdefault(event['task_id'], []).append(event)
+        read_columns = None if columns is None else list(dict.fromkeys(['task_id'] + list(columns)))
+        if self.storage.exists():
+            for chunk in self.storage.read_chunks(chunk_size, read_columns):
+                chunk_events = [event for task_id in chunk['task_id'].tolist() for event in events.pop(task_id, [])]
+                chunk = apply_events(chunk, chunk_events)
+                yield chunk.reindex(columns=columns) if columns else chunk
+        if events:
+            created = [event for event in logged if event['task_id'] in events]
+            new_rows = apply_events(pd.DataFrame(columns=read_columns or TASK_COLUMNS), created)
+            for start in range(0, len(new_rows), chunk_size):
+                chunk = new_rows.iloc[start:start + chunk_size]
+                yield chunk.reindex(columns=columns) if columns else chunk
+        if include_archive and self.archive is not None:
+            for chunk in self.archive.read_chunks(chunk_size, read_columns):
+                yield chunk.reindex(columns=columns) if columns else chunk
+
+    def _archived_max_task_id(self):
+        return self.archive.max_task_id() if self.archive is not None else 0
+
+    def _archived_task(self, task_id):
+        if self.archive is None:
+            return None
+        try:
+            archived = self.archive.get([task_id], self.columns)
+        except (ValueError, TypeError):
+            return None
+        return archived if len(archived) else None
+
+    def _restore_events(self, task_ids):
+        """
+        Events recreating the archived tasks among `task_ids` in the table,
+        and the task_ids found neither in the table nor in the archive.
+        """
+        missing = set(task_ids) - set(self.df.loc[self.df['task_id'].isin(task_ids), 'task_id'].tolist())
+        if not missing or self.archive is None:
+            return [], missing
+        archived = self.archive.get(missing)
+        events = [make_event('create', row['task_id'], row) for row in archived.to_dict('records')]
+        return events, missing - set(archived['task_id'].tolist())
+
+    def _log_with_restore(self, restore_events, events):
+        self._log(restore_events + events)
+        if restore_events:
+            # logged first: a crash in between leaves a copy in the archive, which the next compaction replaces
+            with self._write_lock():
+                self.archive.remove([event['task_id'] for event in restore_events])
+                self._loaded_signature = self._signature()
+                self._assignee_index = None  # the restored tasks' expertise moved from the archive summary
+                self._publish()
+
+    def update_task(self, task_id, **fields):
+        """Sets `fields` on the task with `task_id`."""
+        restore_events, unknown = self._restore_events([task_id])
+        if unknown:
+            raise KeyError(f"Task {task_id} not found")
+        self._log_with_restore(restore_events, [make_event('update', task_id, fields)])
+        logging.info("Task %s updated: %s", task_id, list(fields))
+
+    def update_tasks(self, updates):
+        """Applies {task_id: {column: value}} to many tasks with a single log append."""
+        restore_events, unknown = self._restore_events(updates)
+        if unknown:
+            raise KeyError(f"Tasks not found: {sorted(unknown)[:10]}")
+        self._log_with_restore(restore_events,
+                               [make_event('update', task_id, fields) for task_id, fields in updates.items()])
+        logging.info("%s tasks updated", len(updates))
+
+    def complete_task(self, task_id):
+        """Marks the task with `task_id` as Completed."""
+        if not (self.df['task_id'] == task_id).any():
+            if self.archive is not None and len(self.archive.get([task_id])):
+                return  # archived tasks are completed already
+            raise KeyError(f"Task {task_id} not found")
+        self._log([make_event('complete', task_id)])
+        logging.info("Task %s marked as complete", task_id)
+
+    @property
+    def _queryable(self):
+        return hasattr(self.storage, 'query') and self.columns is None
+
+    def _filter_mask(self, filters=None, search=None):
+        return task_filter_mask(self.df, filters, search)
+
+    def _spans_archive(self, filters, include_archive):
+        if self.archive is None:
+            return False
+        if include_archive is None:
+            return (filters or {}).get('status') == ARCHIVED_STATUS
+        return include_archive
+
+    def filter_tasks(self, filters=None, search=None, columns=None, include_archive=None):
+        """
+        Returns the tasks matching `filters` ({column: value}, None meaning
+        unassigned / missing) whose title or description contains `search`.
+
+        Pushed down to the backend when it can query (SQLite indexes + FTS5),
+        otherwise evaluated as a single combined mask over the loaded table.
+        Archived tasks are included for status "Completed" or, whatever the
+        filters, with include_archive=True.
+        """
+        if self._queryable:
+            return self.storage.query(filters=filters, search=search, columns=columns)
+
+        filtered_df = self.df[self._filter_mask(filters, search)]
+        if columns:
+            filtered_df = filtered_df[columns]
+        if self._spans_archive(filters, include_archive):
+            archived = self.archive.query(filters, search, columns or self.columns)
+            filtered_df = pd.concat([filtered_df, archived], ignore_index=True) if len(archived) else filtered_df
+        return filtered_df
+
+    def _sort_keys(self, values, sort_by, descending=False):
+        """int64 sort keys of `sort_by` values; missing dates come last in either direction."""
+        if sort_by == 'task_id':
+            return np.asarray(values, dtype=np.int64)
+        keys = np.asarray(pd.to_datetime(values), dtype='datetime64[ns]').view(np.int64)
+        # NaT is the smallest int64, i.e. already last when descending
+        return keys if descending else np.where(keys == np.iinfo(np.int64).min, np.iinfo(np.int64).max, keys)
+
+    def _page_frame(self, df, mask, sort_by, descending, after, limit):
+        total = int(mask.sum())
+        task_ids = df['task_id'].to_numpy(dtype=np.int64)
+        keys = self._sort_keys(df[sort_by].to_numpy(), sort_by, descending)
+        if after is not None:
+            key = self._sort_keys([after[0]], sort_by, descending)[0]
+            task_id = int(after[1])
+            if descending:
+                mask &= (keys < key) | ((keys == key) & (task_ids < task_id))
+            else:
+                mask &= (keys > key) | ((keys == key) & (task_ids > task_id))
+
+        # select the page without sorting everything that matches
+        positions = np.flatnonzero(mask)
+        candidates = pd.DataFrame({'key': keys[positions], 'task_id': task_ids[positions]})
+        select = candidates.nlargest if descending else candidates.nsmallest
+        return df.iloc[positions[select(limit, ['key', 'task_id']).index]], total
+
+    def page_tasks(self, filters=None, search=None, sort_by='task_id', descending=False, after=None,
+                   page_size=PAGE_SIZE, columns=None, include_archive=None):
+        """
+        One page of the tasks matching `filters` / `search` (see filter_tasks),
+        ordered by `sort_by` (one of SORT_COLUMNS, ties by task_id; tasks
+        without that date last in either direction) and starting after the
+        `after` cursor.
+
+        Returns (page, next_cursor, total): the page restricted to `columns`,
+        the cursor to pass as `after` for the following page (None on the last
+        one) and the number of matching tasks. Only the page rows are copied
+        out, whatever the number of matches or the depth of the page.
+        Archived tasks are paged through like in filter_tasks.
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Tasks can only be sorted by {SORT_COLUMNS}, not {sort_by}")
+        fetch_columns = None
+        if columns:
+            fetch_columns = list(columns) + [col for col in dict.fromkeys(['task_id', sort_by]) if col not in columns]
+
+        # one extra row tells whether there is a next page
+        if self._queryable:
+            page = self.storage.page(filters, search, sort_by, descending, after, page_size + 1, fetch_columns)
+            total = self.storage.count(filters, search)
+        else:
+            df, mask = self.df, self._filter_mask(filters, search)
+            if self._spans_archive(filters, include_archive):
+                archived = self.archive.query(filters, search, fetch_columns or self.columns)
+                df = pd.concat([df[mask][fetch_columns] if fetch_columns else df[mask], archived], ignore_index=True)
+                mask = np.ones(len(df), dtype=bool)
+            page, total = self._page_frame(df, mask, sort_by, descending, after, page_size + 1)
+
+        next_cursor = None
+        if len(page) > page_size:
+            page = page.iloc[:page_size]
+            next_cursor = (page[sort_by].iloc[-1], int(page['task_id'].iloc[-1]))
+        return (page[columns] if columns else page), next_cursor, total
+
+    def get_task(self, task_id):
+        """
+        The task with `task_id` as a one-row DataFrame, found through a
+        task_id index or else in the archive (KeyError if missing).
+        """
+        if self._task_positions is None or self._task_positions[0] is not self.df:
+            # rebuilt whenever the table object is replaced (creates, compaction, reloads)
+            self._task_positions = (self.df, pd.Index(self.df['task_id']))
+        try:
+            position = self._task_positions[1].get_loc(task_id)
+        except (KeyError, TypeError):
+            archived = self._archived_task(task_id)
+            if archived is None:
+                raise KeyError(f"Task {task_id} not found")
+            return archived
+        return self.df.iloc[[position]] if isinstance(position, (int, np.integer)) else self.df.iloc[position]
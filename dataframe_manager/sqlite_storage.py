@@ -0,0 +1,232 @@
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from logger_n_exception.logger import logging
+from logger_n_exception.metrics import timed
+import pandas as pd
+import numpy as np
+
+from dataframe_manager.storage import TASK_COLUMNS, DATE_COLUMNS, coerce_task_dtypes
+
+INDEXED_COLUMNS = ['status', 'category', 'type', 'priority', 'assignee', 'due_date']
+SQL_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+# stand-ins for missing dates in ascending / descending order, so they sort after every real one
+# in both directions, like NaT in DataFrameManager.page_tasks
+MISSING_DATE_KEY = '9999-12-31 23:59:59'
+MISSING_DATE_KEY_DESC = '0000-01-01 00:00:00'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id INTEGER PRIMARY KEY,
+    title TEXT,
+    created_at TEXT,
+    due_date TEXT,
+    status TEXT,
+    description TEXT,
+    category TEXT,
+    type TEXT,
+    priority TEXT,
+    estimated_hours REAL,
+    assignee TEXT
+);
+""" + "".join(f"CREATE INDEX IF NOT EXISTS idx_tasks_{col} ON tasks({col});\n" for col in INDEXED_COLUMNS)
+
+# external-content FTS5 index over title/description, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(title, description, content='tasks', content_rowid='task_id');
+CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts(rowid, title, description) VALUES (new.task_id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, title, description) VALUES ('delete', old.task_id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, title, description) VALUES ('delete', old.task_id, old.title, old.description);
+    INSERT INTO tasks_fts(rowid, title, description) VALUES (new.task_id, new.title, new.description);
+END;
+"""
+
+
+def _sql_value(col, value):
+    """Converts a DataFrame / change-event value into something sqlite3 can bind."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if col in DATE_COLUMNS:
+        return pd.Timestamp(value).strftime(SQL_DATE_FORMAT)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _check_columns(columns):
+    unknown = set(columns) - set(TASK_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown task columns: {sorted(unknown)}")
+    return list(columns)
+
+
+class SQLiteStorage():
+    """
+    Task table in an SQLite database.
+
+    status, category, type, priority, assignee and due_date are indexed and
+    title/description are covered by an FTS5 index, so `query` pushes filters
+    and text search down to SQLite instead of scanning a DataFrame. Writes are
+    row-level transactions, so no change log is needed on top.
+    """
+    supports_row_writes = True
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            try:
+                conn.executescript(FTS_SCHEMA)
+                self.has_fts = True
+            except sqlite3.OperationalError as e:
+                logging.warning("FTS5 unavailable (%s); falling back to LIKE search.", e)
+                self.has_fts = False
+
+    def __repr__(self):
+        return f"SQLiteStorage(file_path={self.file_path})"
+
+    @contextmanager
+    def _connect(self):
+        # one short-lived connection per call keeps this safe across Streamlit threads
+        conn = sqlite3.connect(self.file_path, timeout=30)
+        try:
+            with conn:  # commit on success, roll back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def exists(self):
+        return os.path.exists(self.file_path)
+
+    def read(self, columns=None):
+        return self.query(columns=columns)
+
+    def read_chunks(self, chunk_size, columns=None):
+        """Streams the table (by task_id) as DataFrames of up to `chunk_size` rows."""
+        columns = _check_columns(columns or TASK_COLUMNS)
+        with self._connect() as conn:
+            for chunk in pd.read_sql_query(f"SELECT {', '.join(columns)} FROM tasks ORDER BY task_id", conn,
+                                           chunksize=chunk_size):
+                yield coerce_task_dtypes(chunk)
+
+    def _insert(self, conn, df):
+        columns = [col for col in TASK_COLUMNS if col in df]
+        rows = [
+            tuple(_sql_value(col, value) for col, value in zip(columns, row))
+            for row in df[columns].itertuples(index=False, name=None)
+        ]
+        placeholders = ", ".join("?" for _ in columns)
+        conn.executemany(f"INSERT INTO tasks ({', '.join(columns)}) VALUES ({placeholders})", rows)
+        return len(rows)
+
+    @timed('storage_write', backend='sqlite')
+    def write(self, df):
+        """Replaces the whole table with `df`."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM tasks")
+            written = self._insert(conn, df)
+        logging.info("Wrote %s tasks to %s", written, self.file_path)
+
+    @timed('storage_append', backend='sqlite')
+    def append(self, df):
+        """Inserts the rows of `df` (tasks with new task_ids) in one transaction."""
+        with self._connect() as conn:
+            self._insert(conn, df)
+
+    @timed('storage_apply_events', backend='sqlite')
+    def apply_events(self, events):
+        """Applies change events (see change_log.make_event) in one transaction."""
+        with self._connect() as conn:
+            for event in events:
+                fields = dict(event.get('fields', {}))
+                if event['op'] == 'complete':
+                    fields = {'status': 'Completed'}
+                fields.pop('task_id', None)
+                columns = _check_columns(fields)
+                values = [_sql_value(col, fields[col]) for col in columns]
+
+                if event['op'] == 'create':
+                    placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+                    updates = ", ".join(f"{col} = excluded.{col}" for col in columns) or "task_id = task_id"
+                    conn.execute(
+                        f"INSERT INTO tasks (task_id{''.join(', ' + col for col in columns)}) VALUES ({placeholders}) "
+                        f"ON CONFLICT(task_id) DO UPDATE SET {updates}",
+                        [event['task_id']] + values)
+                elif columns:
+                    assignments = ", ".join(f"{col} = ?" for col in columns)
+                    conn.execute(f"UPDATE tasks SET {assignments} WHERE task_id = ?", values + [event['task_id']])
+
+    def _where(self, filters=None, search=None):
+        clauses, params = [], []
+        for col, value in (filters or {}).items():
+            _check_columns([col])
+            if value is None:
+                clauses.append(f"{col} IS NULL")
+            else:
+                clauses.append(f"{col} = ?")
+                params.append(_sql_value(col, value))
+
+        terms = re.findall(r"\w+", search or "")
+        if terms and self.has_fts:
+            # prefix match on every term, e.g. "auth log" -> "auth"* "log"*
+            clauses.append("task_id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)")
+            params.append(" ".join(f'"{term}"*' for term in terms))
+        elif search:
+            clauses.append("(title LIKE ? OR description LIKE ?)")
+            params += [f"%{search}%"] * 2
+
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    @timed('storage_read', backend='sqlite')
+    def query(self, filters=None, search=None, columns=None):
+        """
+        Returns the tasks matching `filters` ({column: value}, None meaning
+        IS NULL) and the full-text `search`, as a typed DataFrame.
+        """
+        columns = _check_columns(columns or TASK_COLUMNS)
+        where, params = self._where(filters, search)
+        with self._connect() as conn:
+            df = pd.read_sql_query(f"SELECT {', '.join(columns)} FROM tasks{where}", conn, params=params)
+        return coerce_task_dtypes(df)
+
+    @timed('storage_read', backend='sqlite')
+    def page(self, filters=None, search=None, sort_by='task_id', descending=False, after=None, limit=50,
+             columns=None):
+        """
+        Up to `limit` matching tasks ordered by (`sort_by`, task_id) that come
+        after the `after` = (sort value, task_id) cursor. Uses keyset
+        pagination, so deep pages cost the same as the first one. Tasks
+        without a `sort_by` date come last in either direction.
+        """
+        columns = _check_columns(columns or TASK_COLUMNS)
+        _check_columns([sort_by])
+        where, params = self._where(filters, search)
+        missing = MISSING_DATE_KEY_DESC if descending else MISSING_DATE_KEY
+        key = f"COALESCE({sort_by}, '{missing}')" if sort_by in DATE_COLUMNS else sort_by
+        op, order = ('<', 'DESC') if descending else ('>', 'ASC')
+        if after is not None:
+            value, task_id = after
+            value = missing if sort_by in DATE_COLUMNS and pd.isna(value) else _sql_value(sort_by, value)
+            where += (" AND " if where else " WHERE ") + f"({key} {op} ? OR ({key} = ? AND task_id {op} ?))"
+            params += [value, value, int(task_id)]
+        with self._connect() as conn:
+            df = pd.read_sql_query(f"SELECT {', '.join(columns)} FROM tasks{where} "
+                                   f"ORDER BY {key} {order}, task_id {order} LIMIT ?", conn, params=params + [limit])
+        return coerce_task_dtypes(df)
+
+    def count(self, filters=None, search=None):
+        where, params = self._where(filters, search)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM tasks{where}", params).fetchone()[0]
+
+    def distinct_values(self, col):
+        _check_columns([col])
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute(f"SELECT DISTINCT {col} FROM tasks WHERE {col} IS NOT NULL")]
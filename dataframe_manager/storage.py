@@ -0,0 +1,170 @@
+import os
+import argparse
+from logger_n_exception.logger import logging
+from logger_n_exception.metrics import timed
+import pandas as pd
+import numpy as np
+
+TASK_COLUMNS = ['task_id', 'title', 'created_at', 'due_date', 'status', 'description',
+                'category', 'type', 'priority', 'estimated_hours', 'assignee']
+DATE_COLUMNS = ['created_at', 'due_date']
+CATEGORICAL_COLUMNS = ['status', 'category', 'type', 'priority', 'assignee']
+
+
+def coerce_task_dtypes(df):
+    """Parses the date columns and turns empty assignees into NaN, in place."""
+    for col in DATE_COLUMNS:
+        if col in df and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce', format='ISO8601')
+    if 'assignee' in df and df['assignee'].dtype == object:
+        df['assignee'] = df['assignee'].mask(df['assignee'] == '')
+    return df
+
+
+def compact_task_dtypes(df):
+    """
+    Shrinks the table in place: low-cardinality text columns become
+    categoricals (filters compare integer codes), task_id becomes int32 and
+    estimated_hours float32.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    if 'task_id' in df and df['task_id'].notna().all() and df['task_id'].dtype != np.int32 \
+            and (df.empty or df['task_id'].max() <= np.iinfo(np.int32).max):
+        df['task_id'] = df['task_id'].astype(np.int32)
+    if 'estimated_hours' in df and df['estimated_hours'].dtype != np.float32:
+        df['estimated_hours'] = pd.to_numeric(df['estimated_hours'], errors='coerce').astype(np.float32)
+    return df
+
+
+def set_task_fields(df, rows, fields):
+    """Assigns `fields` to `rows` (mask or index labels), extending categorical columns as needed."""
+    for col, value in fields.items():
+        if col == 'assignee' and value == '':
+            value = np.nan
+        if col in df and isinstance(df[col].dtype, pd.CategoricalDtype) \
+                and not pd.isna(value) and value not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories([value])
+        df.loc[rows, col] = value
+
+
+def task_filter_mask(df, filters=None, search=None):
+    """
+    Boolean array of the rows of `df` matching `filters` ({column: value},
+    None meaning missing) whose title or description contains `search`.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for col, value in (filters or {}).items():
+        mask &= (df[col].isna() if value is None else df[col] == value).to_numpy()
+    if search:
+        mask &= (df['title'].str.contains(search, case=False, na=False, regex=False) |
+                 df['description'].str.contains(search, case=False, na=False, regex=False)).to_numpy()
+    return mask
+
+
+class CSVStorage():
+    """Row-oriented storage in a single CSV file (the original format)."""
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def __repr__(self):
+        return f"CSVStorage(file_path={self.file_path})"
+
+    def exists(self):
+        return os.path.exists(self.file_path)
+
+    @timed('storage_read', backend='csv')
+    def read(self, columns=None):
+        df = pd.read_csv(self.file_path, usecols=columns)
+        return coerce_task_dtypes(df)
+
+    def read_chunks(self, chunk_size, columns=None):
+        """Streams the table as DataFrames of up to `chunk_size` rows."""
+        for chunk in pd.read_csv(self.file_path, usecols=columns, chunksize=chunk_size):
+            yield coerce_task_dtypes(chunk)
+
+    @timed('storage_write', backend='csv')
+    def write(self, df):
+        df.to_csv(self.file_path, index=False)
+
+    @timed('storage_append', backend='csv')
+    def append(self, df):
+        """Appends the rows of `df` in the file's column order (writing the header if the file is new)."""
+        if self.exists():
+            df = df.reindex(columns=pd.read_csv(self.file_path, nrows=0).columns)
+            df.to_csv(self.file_path, mode='a', header=False, index=False)
+        else:
+            df.to_csv(self.file_path, index=False)
+
+
+class ParquetStorage():
+    """
+    Columnar storage in a Parquet file (pyarrow engine).
+
+    Dates are stored as timestamps and the low-cardinality columns as
+    dictionary-encoded categoricals, so reads need no parsing and can be
+    restricted to the requested columns.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+
+    def __repr__(self):
+        return f"ParquetStorage(file_path={self.file_path})"
+
+    def exists(self):
+        return os.path.exists(self.file_path)
+
+    @timed('storage_read', backend='parquet')
+    def read(self, columns=None):
+        return pd.read_parquet(self.file_path, columns=columns, engine='pyarrow')
+
+    def read_chunks(self, chunk_size, columns=None):
+        """Streams the table as DataFrames of up to `chunk_size` rows."""
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(self.file_path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+
+    @timed('storage_write', backend='parquet')
+    def write(self, df):
+        df = coerce_task_dtypes(df.copy())
+        for col in CATEGORICAL_COLUMNS:
+            if col in df:
+                df[col] = df[col].astype('category')
+        # write next to the target and swap, so readers never see a partial file
+        tmp_path = f"{self.file_path}.tmp"
+        df.to_parquet(tmp_path, index=False, engine='pyarrow')
+        os.replace(tmp_path, self.file_path)
+
+
+def get_storage(file_path):
+    """Picks the storage backend from the file extension."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        return ParquetStorage(file_path)
+    if extension in ('.db', '.sqlite', '.sqlite3'):
+        from dataframe_manager.sqlite_storage import SQLiteStorage  # imports this module
+        return SQLiteStorage(file_path)
+    return CSVStorage(file_path)
+
+
+def migrate_storage(src_path, dst_path):
+    """Copies a task table between backends (CSV, Parquet, SQLite) and returns `dst_path`."""
+    df = get_storage(src_path).read()
+    get_storage(dst_path).write(df)
+    logging.info("Migrated %s tasks from %s to %s", len(df), src_path, dst_path)
+    return dst_path
+
+
+def migrate_csv_to_parquet(csv_path, parquet_path=None):
+    """Converts a task CSV into a typed Parquet file and returns its path."""
+    return migrate_storage(csv_path, parquet_path or os.path.splitext(csv_path)[0] + '.parquet')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate the task table to another storage backend.")
+    parser.add_argument("src_path", nargs="?", default="task_logs/tasks_data.csv")
+    parser.add_argument("dst_path", nargs="?", default="task_logs/tasks_data.parquet",
+                        help="target file; .parquet for Parquet, .db / .sqlite for SQLite")
+    args = parser.parse_args()
+    print(migrate_storage(args.src_path, args.dst_path))
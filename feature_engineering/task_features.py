@@ -0,0 +1,60 @@
+import pandas as pd
+import numpy as np
+
+# features derived from created_at / due_date / estimated_hours, as used in EDA.ipynb
+DERIVED_FEATURES = ['created_dow', 'expected_days', 'is_overdue', 'hours_per_day']
+
+
+def task_dates(df):
+    """created_at / due_date as datetimes; already parsed columns are used as they are."""
+    dates = []
+    for col in ['created_at', 'due_date']:
+        values = df[col]
+        if not pd.api.types.is_datetime64_any_dtype(values):
+            values = pd.to_datetime(values, errors='coerce', format='ISO8601')
+        dates.append(values)
+    return dates
+
+
+def expected_days(created_at, due_date):
+    """Whole days between creation and due date."""
+    return (due_date - created_at).dt.days
+
+
+def hours_per_day(estimated_hours, days, zero_days=np.nan):
+    """estimated_hours spread over `days`; same-day tasks count as `zero_days` days."""
+    return pd.to_numeric(estimated_hours, errors='coerce') / days.replace(0, zero_days)
+
+
+def task_hours_per_day(df):
+    """Daily load of each task (NaN for same-day tasks), used for assignee workloads."""
+    return hours_per_day(df['estimated_hours'], expected_days(*task_dates(df)))
+
+
+def task_features(df, columns, now=None):
+    """
+    Model input frame with `columns`, in that order, for every row of `df`.
+
+    Raw task columns are passed through and DERIVED_FEATURES are computed
+    column-wise, parsing the dates once. `df` is neither modified nor copied
+    as a whole. Scaling / encoding is left to the fitted preprocessing step
+    stored in each model pipeline. is_overdue is measured at `now` (one
+    time, or one per row; the current time by default).
+    """
+    derived = [col for col in columns if col in DERIVED_FEATURES]
+    computed = {}
+    if derived:
+        created_at, due_date = task_dates(df)
+        days = expected_days(created_at, due_date)
+        computed['expected_days'] = days
+        if 'created_dow' in derived:
+            computed['created_dow'] = created_at.dt.dayofweek
+        if 'is_overdue' in derived:
+            computed['is_overdue'] = (due_date < (pd.Timestamp.now() if now is None else now)).astype(int)
+        if 'hours_per_day' in derived:
+            # the priority model was trained with same-day tasks counted as one day
+            computed['hours_per_day'] = hours_per_day(df['estimated_hours'], days, zero_days=1)
+
+    return pd.DataFrame({
+        col: (computed[col] if col in computed else df[col]).to_numpy() for col in columns
+    }, index=df.index)
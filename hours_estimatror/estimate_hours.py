@@ -1,42 +1,47 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-import pickle
 from logger_n_exception.logger import logging
+from logger_n_exception.metrics import timed
+from model_registry.registry import load_native_or_pickle
+from model_registry.native import NativeBoosterPipeline
+from feature_engineering.task_features import task_features
+
+MODEL_PATH = 'hours_estimatror/xgb_r.pkl'
+NATIVE_MODEL_PATH = 'hours_estimatror/xgb_r.json'
+
+
+def load_hours_model():
+    """The exported booster when available, the pickled pipeline otherwise."""
+    return load_native_or_pickle(NATIVE_MODEL_PATH, NativeBoosterPipeline.load, MODEL_PATH)
+
+
+@timed('predict_batch', model='hours')
+def predict_hours_batch(tasks_desc):
+    """Predicts estimated hours for every row of `tasks_desc` in one model call."""
+    xgb_r = load_hours_model()
+
+    # the pipeline carries its own fitted MinMaxScaler for expected_days
+    features = task_features(tasks_desc, xgb_r.feature_names_in_.tolist())
+    estimated_hours = xgb_r.predict(features)
+
+    # average with the user's own estimate where one was given
+    estimate_input = pd.to_numeric(tasks_desc['estimated_hours'], errors='coerce').fillna(0).values
+    estimated_hours = np.where(estimate_input > 0, (estimated_hours + estimate_input) / 2, estimated_hours)
+    logging.info("Predicted estimated hours for %s tasks.", len(estimated_hours))
+    return np.round(estimated_hours, 1)
+
 
 def predict_hours(tasks_desc):
     """Predicts the estimated hours for a task based on its description."""
 
     try:
-        with open('hours_estimatror/xgb_r.pkl', 'rb') as f:
-            xgb_r = pickle.load(f)
-            logging.info("Loaded XGB Regressor model for hours estimation.")
+        estimated_hours = predict_hours_batch(tasks_desc)
+        logging.info("Predicted estimated hours: %s for task description.", estimated_hours)
     except FileNotFoundError:
         logging.error("Model file not found. Ensure the model is trained and saved correctly.")
         return "Model not found"
-    
-    estimate_input = tasks_desc['estimated_hours'].values
-    
-    for col in ['created_at', 'due_date']:
-        tasks_desc[col] = pd.to_datetime(tasks_desc[col], errors='coerce')
-        
-    tasks_desc['expected_days'] = (tasks_desc['due_date'] - tasks_desc['created_at']).dt.days
-    
-    tasks_desc = tasks_desc.drop(columns=[
-        'task_id', 'title', 'created_at', 'due_date', 'description', 'estimated_hours', "assignee"])
-    
-    minmax = MinMaxScaler()
-    tasks_desc['expected_days'] = minmax.fit_transform(tasks_desc[['expected_days']])
-
-    try:
-        estimated_hours = xgb_r.predict(tasks_desc)
-        logging.info(f"Predicted estimated hours: {estimated_hours} for task description.")
     except Exception as e:
-        logging.error(f"Error during hours prediction: {e}")
+        logging.error("Error during hours prediction: %s", e)
         return "Prediction error"
 
-    if estimate_input > 0:
-        return np.round((estimated_hours + estimate_input)/2, 1)
-    return np.round(estimated_hours, 1)
-
-
+    return estimated_hours
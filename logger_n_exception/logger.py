@@ -1,18 +1,135 @@
+import os
+import glob
+import json
+import queue
+import atexit
 import logging
+import logging.handlers
 from datetime import datetime
-import os
 
 
-LOG_FILE_NAME = f"{datetime.now().strftime('%m%d%Y__%H%M%S')}.log"
+LOG_DIR = os.environ.get('LOG_DIR', "datadir/logs")
+
+# every process (uvicorn worker, Streamlit app, CLI) writes and rotates its own file: {pid} is replaced by its pid
+LOG_FILE_PATH = os.path.join(LOG_DIR, os.environ.get('LOG_FILE_NAME', "tasks.{pid}.log"))
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+# rotate at midnight or once the file reaches LOG_MAX_BYTES, keeping LOG_BACKUP_COUNT old files
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 50 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 14))
+# records waiting for the writer thread; further records are dropped (and counted) rather than blocking
+LOG_QUEUE_SIZE = 10000
+
+# attributes of every LogRecord; anything else was passed through `extra=` and goes into the JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, location, message, `extra` fields and traceback."""
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SizedTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """
+    Rotates at the `when` interval and whenever the file reaches `max_bytes`;
+    several rollovers in one interval get numbered suffixes (.001, .002, ...).
+    """
+    def __init__(self, filename, max_bytes=LOG_MAX_BYTES, when='midnight', backupCount=LOG_BACKUP_COUNT, **kwargs):
+        super().__init__(filename, when=when, backupCount=backupCount, encoding='utf-8', delay=True, **kwargs)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record):
+        if super().shouldRollover(record):
+            return True
+        return self.max_bytes > 0 and self.stream is not None and self.stream.tell() >= self.max_bytes
+
+    def getFilesToDelete(self):
+        # pruned backups free their names for later rollovers, so the oldest backups are the least
+        # recently written ones, not the first ones by name
+        prefix = f"{self.baseFilename}."
+        backups = [path for path in glob.glob(f"{glob.escape(prefix)}*") if self.extMatch.search(path[len(prefix):])]
+        backups.sort(key=lambda path: (os.path.getmtime(path), path))
+        return backups[:max(len(backups) - self.backupCount, 0)]
+
+    def rotation_filename(self, default_name):
+        name = super().rotation_filename(default_name)
+        n = 0
+        while os.path.exists(name):
+            n += 1
+            name = f"{default_name}.{n:03d}"
+        return name
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without waiting for it. Only the
+    message is merged in the caller; formatting and file I/O happen on the
+    listener thread. Records arriving while the queue is full are dropped.
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # the record is only handed to this handler, so it is updated in place instead of copied;
+        # the arguments are merged now as they may change after the call returns
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _stop(listener):
+    if listener._thread is not None:
+        listener.stop()
+
+
+def configure_logging(log_file_path=LOG_FILE_PATH, level=LOG_LEVEL):
+    """
+    Routes the root logger through a bounded queue to a JSON rotating file
+    written by a background listener thread, and returns the listener.
+    "{pid}" in `log_file_path` becomes the pid, so processes never rotate
+    each other's file.
+    """
+    log_file_path = log_file_path.replace("{pid}", str(os.getpid()))
+    os.makedirs(os.path.dirname(log_file_path) or '.', exist_ok=True)
+    file_handler = SizedTimedRotatingFileHandler(log_file_path)
+    file_handler.setFormatter(JsonFormatter())
 
-LOG_DIR = "datadir/logs"
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    # flush what is still queued when the process exits
+    atexit.register(_stop, listener)
 
-os.makedirs(LOG_DIR, exist_ok=True)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    return listener
 
-LOG_FILE_PATH = os.path.join(LOG_DIR, LOG_FILE_NAME)
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s] %(lineno)d %(name)s - %(levelname)s %(message)s",
-    level=logging.INFO
-)
\ No newline at end of file
+_listener = configure_logging()
@@ -0,0 +1,225 @@
+import os
+import time
+import random
+import bisect
+import threading
+from functools import wraps
+from logger_n_exception.logger import logging
+
+# fraction of spans whose duration is recorded; call / error counts are always exact
+SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '1.0'))
+# Prometheus text file written by dump_metrics / start_metrics_dump (for processes without an HTTP endpoint)
+METRICS_PATH = os.environ.get('METRICS_PATH', 'datadir/metrics.prom')
+METRICS_DUMP_INTERVAL = 15
+METRIC_PREFIX = 'tasks'
+# histogram upper bounds: seconds for durations, rows for batch sizes
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384, 65536)
+
+_dump_thread = None
+_dump_lock = threading.Lock()
+
+
+class Histogram():
+    """Bucketed observations with their sum and count (Prometheus histogram)."""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Span():
+    """Context manager timing one call of a span, see MetricsRegistry.span."""
+    __slots__ = ('registry', 'key', 'start')
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.key = key
+        self.start = None
+
+    def __enter__(self):
+        sample_rate = self.registry.sample_rate
+        if sample_rate >= 1 or random.random() < sample_rate:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = None if self.start is None else time.perf_counter() - self.start
+        self.registry._record_span(self.key, duration, exc_type is not None)
+        return False
+
+
+def _labels_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    labels = list(labels) + list(extra)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry():
+    """
+    In-process counters and histograms, rendered in the Prometheus text format.
+
+    `span(name)` times a block: every call increments span_calls_total (and
+    span_errors_total when it raises) while only a `sample_rate` fraction of
+    calls is timed into span_duration_seconds, so instrumented hot paths pay
+    a dictionary update and, when sampled, two perf_counter calls.
+    """
+    def __init__(self, sample_rate=SAMPLE_RATE, prefix=METRIC_PREFIX):
+        self.sample_rate = sample_rate
+        self.prefix = prefix
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"MetricsRegistry(counters={len(self._counters)}, histograms={len(self._histograms)}, sample_rate={self.sample_rate})"
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=DURATION_BUCKETS, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def _record_span(self, key, duration, failed):
+        with self._lock:
+            calls = ('span_calls_total', key)
+            self._counters[calls] = self._counters.get(calls, 0) + 1
+            if failed:
+                errors = ('span_errors_total', key)
+                self._counters[errors] = self._counters.get(errors, 0) + 1
+            if duration is not None:
+                histogram = self._histograms.get(('span_duration_seconds', key))
+                if histogram is None:
+                    histogram = self._histograms[('span_duration_seconds', key)] = Histogram(DURATION_BUCKETS)
+                histogram.observe(duration)
+
+    def span(self, name, **labels):
+        """Counts (and for sampled calls times) the enclosed block as span `name`."""
+        return Span(self, _labels_key(dict(labels, span=name)))
+
+    def timed(self, name, **labels):
+        """Decorator running the function inside `span(name)`."""
+        key = _labels_key(dict(labels, span=name))
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with Span(self, key):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (h.buckets, list(h.counts), h.sum, h.count))
+                                for key, h in self._histograms.items())
+        lines = []
+        seen = set()
+        for (name, labels), value in counters:
+            full_name = f"{self.prefix}_{name}"
+            if full_name not in seen:
+                seen.add(full_name)
+                lines.append(f"# TYPE {full_name} counter")
+            lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), (buckets, counts, total, count) in histograms:
+            full_name = f"{self.prefix}_{name}"
+            if full_name not in seen:
+                seen.add(full_name)
+                lines.append(f"# TYPE {full_name} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                lines.append(f"{full_name}_bucket{_format_labels(labels, [('le', str(bound))])} {cumulative}")
+            lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{full_name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, file_path=METRICS_PATH):
+        """Writes `render()` to `file_path` (atomically, for the node exporter's textfile collector)."""
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, file_path)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+metrics = MetricsRegistry()
+
+
+def span(name, **labels):
+    return metrics.span(name, **labels)
+
+
+def timed(name, **labels):
+    return metrics.timed(name, **labels)
+
+
+def inc(name, value=1, **labels):
+    metrics.inc(name, value, **labels)
+
+
+def observe(name, value, buckets=DURATION_BUCKETS, **labels):
+    metrics.observe(name, value, buckets, **labels)
+
+
+def render_metrics():
+    return metrics.render()
+
+
+def dump_metrics(file_path=METRICS_PATH):
+    metrics.dump(file_path)
+
+
+def _dump_periodically(file_path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            metrics.dump(file_path)
+        except OSError as e:
+            logging.error("Could not write metrics to %s: %s", file_path, e)
+
+
+def start_metrics_dump(file_path=METRICS_PATH, interval=METRICS_DUMP_INTERVAL):
+    """Rewrites `file_path` every `interval` seconds from a background thread (once per process)."""
+    global _dump_thread
+    with _dump_lock:
+        if _dump_thread is None:
+            _dump_thread = threading.Thread(target=_dump_periodically, args=(file_path, interval),
+                                            name="metrics-dump", daemon=True)
+            _dump_thread.start()
+    return _dump_thread
@@ -0,0 +1,149 @@
+import os
+import json
+import pickle
+import argparse
+from logger_n_exception.logger import logging
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler, OneHotEncoder
+
+# pickled pipeline -> JSON spec written next to it (the booster goes to <spec>.ubj)
+BOOSTER_PIPELINES = {
+    'hours_estimatror/xgb_r.pkl': 'hours_estimatror/xgb_r.json',
+    'priority_prediction/priority_predictor.pkl': 'priority_prediction/priority_predictor.json',
+}
+TEXT_MODELS_PATH = 'nlp/text_models.npz'
+# classifier name -> (TF-IDF classifier pickle, label encoder pickle)
+TEXT_CLASSIFIERS = {
+    'category': ('nlp/category_predict.pkl', 'nlp/lbl_enc_cat.pkl'),
+    'type': ('nlp/type_predict.pkl', 'nlp/lbl_enc.pkl'),
+}
+TFIDF_PATH = 'nlp/tfidf_vect.pkl'
+
+
+def _unpickle(file_path):
+    with open(file_path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _replace(tmp_path, file_path):
+    # readers (and the model registry) only ever see complete files
+    os.replace(tmp_path, file_path)
+
+
+def _scaler_spec(transformer):
+    if isinstance(transformer, Pipeline):
+        if len(transformer.steps) != 1:
+            raise ValueError(f"Only single-step numeric pipelines can be exported, got {transformer.steps}")
+        transformer = transformer.steps[0][1]
+    if isinstance(transformer, MinMaxScaler):
+        if transformer.clip:
+            raise ValueError("Clipping MinMaxScaler can't be exported")
+        return 'minmax', {'scale': transformer.scale_.tolist(), 'min': transformer.min_.tolist()}
+    if isinstance(transformer, StandardScaler):
+        n = transformer.n_features_in_
+        mean = transformer.mean_ if transformer.with_mean else np.zeros(n)
+        scale = transformer.scale_ if transformer.with_std else np.ones(n)
+        return 'standard', {'mean': mean.tolist(), 'scale': scale.tolist()}
+    raise ValueError(f"Unsupported numeric transformer: {transformer!r}")
+
+
+def booster_pipeline_spec(pipeline, booster_file):
+    """JSON-serializable description of a (numeric scaler, OneHotEncoder) ColumnTransformer + XGBoost pipeline."""
+    preprocess, model = pipeline.steps[0][1], pipeline.steps[-1][1]
+    transformers = [(name, t, cols) for name, t, cols in preprocess.transformers_
+                    if not (name == 'remainder' and t == 'drop')]
+    if len(transformers) != 2 or not isinstance(transformers[1][1], OneHotEncoder):
+        raise ValueError("Expected a numeric transformer followed by a OneHotEncoder")
+    (_, numeric, numeric_cols), (_, encoder, categorical_cols) = transformers
+
+    scaler, params = _scaler_spec(numeric)
+    drop_idx = encoder.drop_idx_ if encoder.drop_idx_ is not None else [None] * len(encoder.categories_)
+    return {
+        'feature_names_in': pipeline.feature_names_in_.tolist(),
+        'numeric': {'columns': list(numeric_cols), 'scaler': scaler, 'params': params},
+        'categorical': {
+            'columns': list(categorical_cols),
+            'categories': [categories.tolist() for categories in encoder.categories_],
+            'drop': [None if idx is None else categories[idx] for categories, idx in zip(encoder.categories_, drop_idx)],
+        },
+        'objective': model.objective,
+        'booster': booster_file,
+    }
+
+
+def export_booster_pipeline(pickle_path, spec_path):
+    """Writes the booster as <spec>.ubj and the preprocessing as the JSON spec."""
+    pipeline = _unpickle(pickle_path)
+    booster_path = f"{os.path.splitext(spec_path)[0]}.ubj"
+    spec = booster_pipeline_spec(pipeline, os.path.basename(booster_path))
+
+    pipeline.steps[-1][1].get_booster().save_model(f"{booster_path}.tmp.ubj")
+    _replace(f"{booster_path}.tmp.ubj", booster_path)
+    # the spec is written last: the registry reloads when it changes
+    with open(f"{spec_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(spec, f, indent=1)
+    _replace(f"{spec_path}.tmp", spec_path)
+    logging.info("Exported %s to %s + %s", pickle_path, spec_path, booster_path)
+
+
+def _idf(tfidf_vect):
+    try:
+        return tfidf_vect.idf_
+    except AttributeError:
+        # vectorizers pickled by older scikit-learn keep the idf as a diagonal matrix
+        return tfidf_vect._tfidf._idf_diag.diagonal()
+
+
+def text_models_arrays(tfidf_vect, classifiers):
+    """
+    NumPy arrays of a word TF-IDF vectorizer and linear classifiers on top of
+    it; `classifiers` maps a name to (classifier, label encoder).
+    """
+    if tfidf_vect.analyzer != 'word' or tfidf_vect.ngram_range != (1, 1) or tfidf_vect.tokenizer \
+            or tfidf_vect.preprocessor or tfidf_vect.stop_words or tfidf_vect.strip_accents \
+            or tfidf_vect.binary or tfidf_vect.sublinear_tf or tfidf_vect.norm != 'l2':
+        raise ValueError("Only unigram word TF-IDF with l2 norm and default preprocessing can be exported")
+
+    vocabulary = tfidf_vect.vocabulary_
+    terms = np.empty(len(vocabulary), dtype=object)
+    for term, i in vocabulary.items():
+        terms[i] = term
+    arrays = {
+        'terms': terms.astype(str),
+        'idf': _idf(tfidf_vect),
+        'token_pattern': np.array(tfidf_vect.token_pattern),
+        'lowercase': np.array(tfidf_vect.lowercase),
+        'classifiers': np.array(list(classifiers)),
+    }
+    for name, (classifier, label_encoder) in classifiers.items():
+        if classifier.coef_.shape[0] != len(classifier.classes_):
+            raise ValueError(f"{name}: only one-vs-rest classifiers with one row per class can be exported")
+        arrays[f'{name}_coef'] = classifier.coef_
+        arrays[f'{name}_intercept'] = classifier.intercept_
+        arrays[f'{name}_classes'] = label_encoder.inverse_transform(classifier.classes_).astype(str)
+    return arrays
+
+
+def export_text_models(file_path=TEXT_MODELS_PATH):
+    arrays = text_models_arrays(_unpickle(TFIDF_PATH), {
+        name: (_unpickle(model_path), _unpickle(encoder_path))
+        for name, (model_path, encoder_path) in TEXT_CLASSIFIERS.items()
+    })
+    with open(f"{file_path}.tmp", 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    _replace(f"{file_path}.tmp", file_path)
+    logging.info("Exported TF-IDF + %s classifiers to %s", list(TEXT_CLASSIFIERS), file_path)
+
+
+def export_all():
+    for pickle_path, spec_path in BOOSTER_PIPELINES.items():
+        export_booster_pipeline(pickle_path, spec_path)
+    export_text_models()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the pickled models to XGBoost UBJ / NumPy artifacts.")
+    parser.parse_args()
+    export_all()
+    print("Exported:", ", ".join(list(BOOSTER_PIPELINES.values()) + [TEXT_MODELS_PATH]))
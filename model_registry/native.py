@@ -0,0 +1,127 @@
+import os
+import re
+import json
+from logger_n_exception.logger import logging
+import pandas as pd
+import numpy as np
+import scipy.sparse as sp
+
+
+class NativeBoosterPipeline():
+    """
+    Pickle-free replacement for a ColumnTransformer + XGBoost pipeline.
+
+    The preprocessing (fitted scaler parameters and one-hot categories) is
+    read from a JSON spec and applied with NumPy; the booster is loaded from
+    XGBoost's own UBJ format and called with `inplace_predict`. Exposes
+    `feature_names_in_` and `predict` like the sklearn pipeline it replaces.
+    """
+    def __init__(self, spec, booster):
+        self.spec = spec
+        self.booster = booster
+        self.feature_names_in_ = np.array(spec['feature_names_in'], dtype=object)
+        self._numeric = spec['numeric']
+        self._categorical = spec['categorical']
+        self._scaler = {key: np.asarray(value, dtype=np.float64) for key, value in self._numeric['params'].items()}
+        # one-hot column of every kept category, per categorical feature
+        self._category_columns = []
+        column = len(self._numeric['columns'])
+        for categories, drop in zip(self._categorical['categories'], self._categorical['drop']):
+            kept = [c for c in categories if c != drop]
+            self._category_columns.append(dict(zip(kept, range(column, column + len(kept)))))
+            column += len(kept)
+        self.n_features = column
+
+    def __repr__(self):
+        return f"NativeBoosterPipeline(objective={self.spec['objective']}, features={self.feature_names_in_.tolist()})"
+
+    @classmethod
+    def load(cls, spec_path):
+        import xgboost as xgb
+        with open(spec_path, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+        booster = xgb.Booster()
+        booster.load_model(os.path.join(os.path.dirname(spec_path), spec['booster']))
+        return cls(spec, booster)
+
+    def transform(self, features):
+        """Scaled numeric columns followed by the one-hot columns, as a dense float32 matrix."""
+        matrix = np.zeros((len(features), self.n_features), dtype=np.float32)
+        numeric = features[self._numeric['columns']].to_numpy(dtype=np.float64)
+        # same arithmetic as the fitted sklearn scalers, so split thresholds compare identically
+        if self._numeric['scaler'] == 'minmax':
+            numeric = numeric * self._scaler['scale'] + self._scaler['min']
+        elif self._numeric['scaler'] == 'standard':
+            numeric = (numeric - self._scaler['mean']) / self._scaler['scale']
+        matrix[:, :numeric.shape[1]] = numeric
+
+        rows = np.arange(len(features))
+        for col, columns in zip(self._categorical['columns'], self._category_columns):
+            # unknown and dropped categories stay all-zero, like handle_unknown='ignore'
+            positions = pd.Series(features[col].to_numpy()).map(columns).to_numpy(dtype=np.float64)
+            known = ~np.isnan(positions)
+            matrix[rows[known], positions[known].astype(np.intp)] = 1
+        return matrix
+
+    def predict(self, features):
+        predictions = self.booster.inplace_predict(self.transform(features))
+        if self.spec['objective'] == 'multi:softprob':
+            predictions = predictions.argmax(axis=1)
+        if self.spec['objective'].startswith('multi:'):
+            return predictions.astype(np.int64)
+        return predictions
+
+
+class NativeTextClassifiers():
+    """
+    TF-IDF vectorizer + linear text classifiers rebuilt from NumPy arrays.
+
+    Tokenizes with the vectorizer's token pattern, builds the l2-normalized
+    TF-IDF rows as a sparse matrix and scores every classifier with one
+    sparse-dense product, returning the labels of the highest scores.
+    """
+    def __init__(self, arrays):
+        self.token_pattern = re.compile(str(arrays['token_pattern']))
+        self.lowercase = bool(arrays['lowercase'])
+        self.vocabulary = {term: i for i, term in enumerate(arrays['terms'].tolist())}
+        self.idf = arrays['idf']
+        self.names = [str(name) for name in arrays['classifiers']]
+        self.classifiers = {
+            name: (arrays[f'{name}_coef'].T, arrays[f'{name}_intercept'], arrays[f'{name}_classes'].astype(object))
+            for name in self.names
+        }
+
+    def __repr__(self):
+        return f"NativeTextClassifiers(classifiers={self.names}, vocabulary={len(self.vocabulary)})"
+
+    @classmethod
+    def load(cls, file_path):
+        with np.load(file_path) as arrays:
+            return cls({key: arrays[key] for key in arrays.files})
+
+    def transform(self, texts):
+        """l2-normalized TF-IDF matrix of `texts` (same as TfidfVectorizer.transform)."""
+        indptr, indices = [0], []
+        for text in texts:
+            if self.lowercase:
+                text = text.lower()
+            indices.extend(i for i in map(self.vocabulary.get, self.token_pattern.findall(text)) if i is not None)
+            indptr.append(len(indices))
+        tfidf = sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(texts), len(self.idf)))
+        tfidf.sum_duplicates()
+        tfidf.data *= self.idf[tfidf.indices]
+        # l2-normalize every row in place
+        squares = np.concatenate([[0.0], np.cumsum(tfidf.data ** 2)])
+        norms = np.sqrt(squares[tfidf.indptr[1:]] - squares[tfidf.indptr[:-1]])
+        norms[norms == 0] = 1
+        tfidf.data /= np.repeat(norms, np.diff(tfidf.indptr))
+        return tfidf
+
+    def predict(self, texts):
+        """{classifier name: labels} for `texts`, sharing one TF-IDF matrix."""
+        matrix = self.transform(texts)
+        predictions = {}
+        for name, (coef, intercept, classes) in self.classifiers.items():
+            scores = matrix @ coef + intercept
+            predictions[name] = classes[np.asarray(scores).argmax(axis=1)]
+        return predictions
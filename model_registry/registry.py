@@ -0,0 +1,98 @@
+import os
+import time
+import pickle
+import hashlib
+import threading
+from logger_n_exception.logger import logging
+from logger_n_exception.metrics import span
+
+
+def _file_hash(file_path):
+    """Returns the sha256 digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry():
+    """
+    Process-wide cache of deserialized model artifacts.
+
+    Artifacts are unpickled unless a `loader` (file path -> model) is given,
+    e.g. for the exported native formats. Each artifact is deserialized once and the same in-memory object is handed
+    out to every caller. A cheap `os.stat` check on every lookup detects a
+    changed file; the artifact is only reloaded if its content hash differs.
+    """
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f"ModelRegistry(models={list(self._models)})"
+
+    def get(self, file_path, loader=None):
+        """Returns the model stored at `file_path`, loading it (with `loader`) if needed."""
+        file_path = os.path.normpath(file_path)
+        stat = os.stat(file_path)  # raises FileNotFoundError like open() did
+        entry = self._models.get(file_path)
+        if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry['model']
+
+        with self._lock:
+            entry = self._models.get(file_path)
+            if entry and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                return entry['model']
+
+            file_hash = _file_hash(file_path)
+            if entry and entry['hash'] == file_hash:
+                # touched but unchanged, keep the loaded object
+                entry['mtime'], entry['size'] = stat.st_mtime_ns, stat.st_size
+                return entry['model']
+
+            start = time.perf_counter()
+            with span('model_load', model=os.path.basename(file_path)):
+                if loader is not None:
+                    model = loader(file_path)
+                else:
+                    with open(file_path, 'rb') as f:
+                        model = pickle.load(f)
+            load_time = time.perf_counter() - start
+
+            self._models[file_path] = {
+                'model': model,
+                'mtime': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'hash': file_hash,
+                'load_time': load_time,
+                'loads': (entry['loads'] + 1) if entry else 1,
+            }
+            logging.info("Loaded model %s in %.1f ms.", file_path, load_time * 1000)
+            return model
+
+    def load_timings(self):
+        """Returns load time (seconds) and load count for every cached artifact."""
+        return {
+            path: {'load_time': entry['load_time'], 'loads': entry['loads']}
+            for path, entry in self._models.items()
+        }
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+model_registry = ModelRegistry()
+
+
+def load_model(file_path, loader=None):
+    """Returns the shared in-memory model for `file_path`."""
+    return model_registry.get(file_path, loader)
+
+
+def load_native_or_pickle(native_path, loader, pickle_path):
+    """Prefers the exported native artifact (see model_registry/export.py) over the pickle."""
+    if os.path.exists(native_path):
+        return load_model(native_path, loader)
+    return load_model(pickle_path)
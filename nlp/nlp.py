@@ -2,47 +2,245 @@ import pandas as pd
 import numpy as np
 import warnings
 from logger_n_exception.logger import logging
+from logger_n_exception.metrics import span, timed, inc
 warnings.filterwarnings("ignore")
 
-import pickle
-import spacy
+import os
+import time
+import threading
+from cachetools import LRUCache
+from model_registry.registry import load_model, model_registry
+from model_registry.native import NativeTextClassifiers
 
-if not spacy.util.is_package('en_core_web_md'):
-    logging.info("Downloading the medium-sized English model for spaCy...")
-    spacy.cli.download('en_core_web_md')
-# Load the medium-sized English model
-spacy_nlp = spacy.load('en_core_web_md')
+SPACY_MODEL = 'en_core_web_md'
+# Only tok2vec, tagger, attribute_ruler and lemmatizer are needed for lemmas;
+# is_stop / is_punct / like_num are lexical attributes.
+SPACY_EXCLUDE = ['parser', 'ner', 'senter']
+CLEAN_TEXT_CACHE_SIZE = 4096
+NLP_MODEL_PATHS = [
+    'nlp/tfidf_vect.pkl',
+    'nlp/lbl_enc_cat.pkl',
+    'nlp/category_predict.pkl',
+    'nlp/lbl_enc.pkl',
+    'nlp/type_predict.pkl',
+]
+# exported by model_registry/export.py, used instead of the pickles when present
+TEXT_MODELS_PATH = 'nlp/text_models.npz'
+# kept up to date by retraining/retrain.py, which only puts them here (preferred over both) while they do
+# at least as well as the trained models on its holdout tasks
+ONLINE_TEXT_MODELS_PATH = 'nlp/online_text_models.pkl'
 
+# spaCy is imported and loaded on first use (or by warm_up), not at import time
+_spacy_nlp = None
+_spacy_lock = threading.Lock()
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+_nlp_status = {'state': 'not started', 'error': None, 'load_time': None}
 
-def preprocess_with_spacy(text, return_vector=False):
-    """Returns both cleaned text and vector (or just one)"""
-    text = text.strip().lower()
-    doc = spacy_nlp(text)
-    
-    # Text preprocessing (same as before)
+
+def _load_spacy():
+    import spacy
+    if not spacy.util.is_package(SPACY_MODEL):
+        raise OSError(f"spaCy model '{SPACY_MODEL}' is not installed. "
+                      f"Install it with `python -m spacy download {SPACY_MODEL}`.")
+    return spacy.load(SPACY_MODEL, exclude=SPACY_EXCLUDE)
+
+
+def get_spacy_nlp():
+    """Returns the shared spaCy pipeline, loading it on first call."""
+    global _spacy_nlp
+    if _spacy_nlp is not None:
+        return _spacy_nlp
+
+    with _spacy_lock:
+        if _spacy_nlp is None:
+            _nlp_status.update(state='loading', error=None)
+            start = time.perf_counter()
+            try:
+                with span('spacy_load'):
+                    _spacy_nlp = _load_spacy()
+            except Exception as e:
+                _nlp_status.update(state='failed', error=str(e))
+                logging.error("Could not load spaCy model: %s", e)
+                raise
+            _nlp_status.update(state='ready', load_time=time.perf_counter() - start)
+            logging.info("Loaded spaCy model %s in %.2f s.", SPACY_MODEL, _nlp_status['load_time'])
+    return _spacy_nlp
+
+
+def _warm_up(extra_models):
+    try:
+        get_spacy_nlp()
+        if load_text_models() is None:
+            for path in NLP_MODEL_PATHS:
+                load_model(path)
+        for load in extra_models:
+            load()
+    except Exception as e:
+        logging.error("NLP warm-up failed: %s", e)
+
+
+def warm_up(extra_models=()):
+    """
+    Starts loading spaCy and the model artifacts in a background thread (once
+    per process); `extra_models` are loader functions such as load_hours_model.
+    """
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=_warm_up, args=(extra_models,), name="nlp-warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+def nlp_status():
+    """Returns the spaCy readiness ('not started', 'loading', 'ready' or 'failed') and load timings."""
+    return dict(_nlp_status, models=model_registry.load_timings())
+
+
+_clean_text_cache = LRUCache(maxsize=CLEAN_TEXT_CACHE_SIZE)
+_clean_text_lock = threading.Lock()
+
+
+def _normalize(text):
+    return text.strip().lower()
+
+
+def _clean_doc(doc):
+    """Lemmatized text without stop words, punctuation and numbers"""
     tokens = [token.lemma_ for token in doc 
               if not token.is_stop 
               and not token.is_punct 
               and not token.like_num]
-    clean_text = " ".join(tokens)
+    return " ".join(tokens)
+
+
+def _cache_get(text):
+    with _clean_text_lock:
+        return _clean_text_cache.get(text)
+
+
+def _cache_put(text, clean_text):
+    with _clean_text_lock:
+        _clean_text_cache[text] = clean_text
+
+
+def preprocess_with_spacy(text, return_vector=False):
+    """Returns both cleaned text and vector (or just one)"""
+    text = _normalize(text)
+
+    if not return_vector:
+        clean_text = _cache_get(text)
+        if clean_text is not None:
+            inc('clean_text_cache_total', result='hit')
+            return clean_text
+        inc('clean_text_cache_total', result='miss')
+
+    nlp = get_spacy_nlp()
+    with span('spacy_preprocess'):
+        doc = nlp(text)
+    
+    # Text preprocessing (same as before)
+    clean_text = _clean_doc(doc)
+    _cache_put(text, clean_text)
     
     # Vectorization
     if return_vector:
         return clean_text, doc.vector  # returns tuple (text, vector)
     return clean_text  # or just text if vectors not needed
 
+
+def preprocess_batch(texts, batch_size=256):
+    """Cleans many texts in a single streamed spaCy pass, skipping cached ones"""
+    texts = [_normalize(text) for text in texts]
+    cleaned = [_cache_get(text) for text in texts]
+
+    missing = list(dict.fromkeys(text for text, clean in zip(texts, cleaned) if clean is None))
+    inc('clean_text_cache_total', len(texts) - len(missing), result='hit')
+    inc('clean_text_cache_total', len(missing), result='miss')
+    if missing:
+        nlp = get_spacy_nlp()
+        with span('spacy_preprocess_batch'):
+            computed = dict(zip(missing, (_clean_doc(doc) for doc in nlp.pipe(missing, batch_size=batch_size))))
+        for text, clean_text in computed.items():
+            _cache_put(text, clean_text)
+        cleaned = [computed[text] if clean is None else clean for text, clean in zip(texts, cleaned)]
+
+    return cleaned
+
+
+def _doc_vector(doc):
+    """Mean vector of the content words (the whole doc's when there are none)."""
+    vectors = [token.vector for token in doc if token.has_vector and not token.is_stop and not token.is_punct]
+    return np.mean(vectors, axis=0) if vectors else doc.vector
+
+
+def embed_batch(texts, batch_size=256):
+    """Unit-length float32 word-vector embeddings of `texts` (one row each, zeros for texts without known words)."""
+    nlp = get_spacy_nlp()
+    if not nlp.vocab.vectors_length:
+        raise ValueError(f"spaCy model {SPACY_MODEL} has no word vectors")
+    with span('spacy_embed_batch'):
+        vectors = np.zeros((len(texts), nlp.vocab.vectors_length), dtype=np.float32)
+        for i, doc in enumerate(nlp.pipe([_normalize(text) for text in texts], batch_size=batch_size)):
+            vectors[i] = _doc_vector(doc)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+
+def load_trained_text_models():
+    """The exported TF-IDF + classifiers, or None to fall back to the pickles."""
+    if os.path.exists(TEXT_MODELS_PATH):
+        return load_model(TEXT_MODELS_PATH, NativeTextClassifiers.load)
+    return None
+
+
+def load_text_models():
+    """
+    The incrementally retrained classifiers once retrain.py promoted them,
+    else the exported TF-IDF + classifiers, or None to fall back to the pickles.
+    """
+    if os.path.exists(ONLINE_TEXT_MODELS_PATH):
+        return load_model(ONLINE_TEXT_MODELS_PATH)
+    return load_trained_text_models()
+
+
+def predict_trained_text(texts):
+    """{'category': labels, 'type': labels} of the cleaned `texts` from the trained TF-IDF models only."""
+    text_models = load_trained_text_models()
+    if text_models is not None:
+        return text_models.predict(texts)
+
+    try:
+        tfidf_vect = load_model('nlp/tfidf_vect.pkl')
+        lbl_enc_cat = load_model('nlp/lbl_enc_cat.pkl')
+        cat_predict = load_model('nlp/category_predict.pkl')
+        lbl_enc = load_model('nlp/lbl_enc.pkl')
+        type_predict = load_model('nlp/type_predict.pkl')
+    except FileNotFoundError as e:
+        logging.error("File not found: %s", e)
+        raise
+
+    # one sparse matrix shared by both classifiers
+    texts_vectorized = tfidf_vect.transform(texts)
+    return {
+        'category': lbl_enc_cat.inverse_transform(cat_predict.predict(texts_vectorized)),
+        'type': lbl_enc.inverse_transform(type_predict.predict(texts_vectorized)),
+    }
+
+
+@timed('predict', model='category')
 def predict_task_category(task_desc):
+    text_models = load_text_models()
+    if text_models is not None:
+        return text_models.predict([preprocess_with_spacy(task_desc)])['category'][0]
+
     try:    
-        with open('nlp/tfidf_vect.pkl', 'rb') as f:
-            tfidf_vect = pickle.load(f)
-
-        with open('nlp/lbl_enc_cat.pkl', 'rb') as f:
-            lbl_enc_cat = pickle.load(f)
-        
-        with open('nlp/category_predict.pkl', 'rb') as f:
-            cat_predict = pickle.load(f)
+        tfidf_vect = load_model('nlp/tfidf_vect.pkl')
+        lbl_enc_cat = load_model('nlp/lbl_enc_cat.pkl')
+        cat_predict = load_model('nlp/category_predict.pkl')
     except FileNotFoundError as e:
-        logging.error(f"File not found: {e}")
+        logging.error("File not found: %s", e)
         return "Model not found"
     
     task_desc_cleaned = preprocess_with_spacy(task_desc)
@@ -53,19 +251,18 @@ def predict_task_category(task_desc):
     return predicted_category
 
 
+@timed('predict', model='type')
 def predict_task_type(task_desc):
+    text_models = load_text_models()
+    if text_models is not None:
+        return text_models.predict([preprocess_with_spacy(task_desc)])['type'][0]
 
     try:    
-        with open('nlp/tfidf_vect.pkl', 'rb') as f:
-            tfidf_vect = pickle.load(f)
-
-        with open('nlp/lbl_enc.pkl', 'rb') as f:
-            lbl_enc = pickle.load(f)
-        
-        with open('nlp/type_predict.pkl', 'rb') as f:
-            cat_predict = pickle.load(f)
+        tfidf_vect = load_model('nlp/tfidf_vect.pkl')
+        lbl_enc = load_model('nlp/lbl_enc.pkl')
+        cat_predict = load_model('nlp/type_predict.pkl')
     except FileNotFoundError as e:
-        logging.error(f"File not found: {e}")
+        logging.error("File not found: %s", e)
         return "Model not found"
     
     task_desc_cleaned = preprocess_with_spacy(task_desc)
@@ -77,16 +274,23 @@ def predict_task_type(task_desc):
 
 def predict_task_info(task_desc):
     """Predicts both category and type of the task"""
+    # the cleaned text is computed once and served from the cache for the second model
     try:
         category = predict_task_category(task_desc)
         task_type = predict_task_type(task_desc)
-        logging.info(f"Predicted category: {category}, type: {task_type} for task description.")
+        logging.info("Predicted category: %s, type: %s for task description.", category, task_type)
     except Exception as e:
-        logging.error(f"Error during task info prediction: {e}")
+        logging.error("Error during task info prediction: %s", e)
         return None, None
     
     return category, task_type
 
 
-
-
+@timed('predict_batch', model='category_type')
+def predict_task_info_batch(task_descs):
+    """Predicts category and type for many task descriptions at once"""
+    text_models = load_text_models()
+    cleaned = preprocess_batch(task_descs)
+    predictions = text_models.predict(cleaned) if text_models is not None else predict_trained_text(cleaned)
+    logging.info("Predicted category and type for %s task descriptions.", len(task_descs))
+    return predictions['category'], predictions['type']
@@ -0,0 +1,34 @@
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+N_FEATURES = 2 ** 18
+
+
+class OnlineTextClassifiers():
+    """
+    Text classifiers that can keep learning: a stateless HashingVectorizer
+    (no vocabulary to refit) feeding one SGD linear classifier per target,
+    updated in place with `partial_fit`. `predict` returns {target: labels}
+    like NativeTextClassifiers, so nlp.py can use either.
+    """
+    def __init__(self, classes, n_features=N_FEATURES):
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, norm='l2')
+        self.classes = {name: np.asarray(labels, dtype=object) for name, labels in classes.items()}
+        self.classifiers = {name: SGDClassifier(loss='hinge', alpha=1e-4, random_state=0) for name in classes}
+        self.n_samples = 0
+
+    def __repr__(self):
+        return f"OnlineTextClassifiers(classifiers={list(self.classifiers)}, n_samples={self.n_samples})"
+
+    def partial_fit(self, texts, labels):
+        """Updates every classifier with `texts` and their {target: labels}."""
+        matrix = self.vectorizer.transform(texts)
+        for name, classifier in self.classifiers.items():
+            classifier.partial_fit(matrix, np.asarray(labels[name], dtype=object), classes=self.classes[name])
+        self.n_samples += len(texts)
+        return self
+
+    def predict(self, texts):
+        matrix = self.vectorizer.transform(texts)
+        return {name: classifier.predict(matrix) for name, classifier in self.classifiers.items()}
@@ -0,0 +1,197 @@
+import os
+import json
+import argparse
+import threading
+from logger_n_exception.logger import logging
+from logger_n_exception.metrics import timed
+import pandas as pd
+import numpy as np
+
+from nlp.nlp import embed_batch
+from dataframe_manager.manage_dataframe import DataFrameManager, DATASET_PATH
+from dataframe_manager.change_log import FileLock
+
+TOP_K = 5
+# cosine similarity from which a new task is flagged as a likely duplicate
+DUPLICATE_THRESHOLD = 0.9
+EMBED_CHUNK_SIZE = 1000
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def task_texts(df):
+    """The text a task is embedded from: "title. description", like the category / type models see it."""
+    return (df['title'].fillna("").astype(str) + ". " + df['description'].fillna("").astype(str)).tolist()
+
+
+class TaskEmbeddingIndex():
+    """
+    Unit-length float32 embeddings of the tasks' title + description.
+
+    Rows are appended to a raw float32 file (plus a file of their task_ids)
+    that is memory-mapped for queries, so a top-k lookup is one matrix-vector
+    product over the whole history without loading it into the heap. A task
+    embedded again (e.g. after its title was edited) gets a new row that
+    shadows the old one. Appends take a file lock; readers remap when the
+    file grew.
+    """
+    def __init__(self, base_path):
+        self.vectors_path = f"{base_path}_embeddings.f32"
+        self.ids_path = f"{base_path}_embedding_ids.i64"
+        self.meta_path = f"{base_path}_embeddings.json"
+        self.lock = FileLock(f"{self.vectors_path}.lock")
+        self.dim = None
+        self._size = None
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._live = np.zeros(0, dtype=bool)
+        self._rows = pd.Series(dtype=np.int64)
+        self._refresh_lock = threading.Lock()
+
+    def __repr__(self):
+        return f"TaskEmbeddingIndex(vectors_path={self.vectors_path}, tasks={len(self)}, dim={self.dim})"
+
+    def __len__(self):
+        self._refresh()
+        return len(self._rows)
+
+    def _refresh(self):
+        """Maps the rows written so far (by any process) if the files changed since the last call."""
+        try:
+            size = (os.path.getsize(self.vectors_path), os.path.getsize(self.ids_path))
+        except FileNotFoundError:
+            return
+        if size == self._size:
+            return
+        with self._refresh_lock:
+            if self.dim is None:
+                with open(self.meta_path, 'r', encoding='utf-8') as f:
+                    self.dim = json.load(f)['dim']
+            ids = np.fromfile(self.ids_path, dtype=np.int64)
+            # a row counts once both files hold it (a reader may race an append)
+            n = min(len(ids), size[0] // (self.dim * 4))
+            ids = ids[:n]
+            vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(n, self.dim)) \
+                if n else np.zeros((0, self.dim), dtype=np.float32)
+            rows = pd.Series(np.arange(n), index=ids)
+            rows = rows[~rows.index.duplicated(keep='last')]
+            live = np.zeros(n, dtype=bool)
+            live[rows.to_numpy()] = True
+            self._vectors, self._ids, self._live, self._rows = vectors, ids, live, rows
+            self._size = size
+
+    def task_ids(self):
+        self._refresh()
+        return self._rows.index.to_numpy()
+
+    def vector(self, task_id):
+        """The embedding of `task_id`, None when it isn't indexed."""
+        self._refresh()
+        row = self._rows.get(task_id)
+        return None if row is None else np.asarray(self._vectors[row])
+
+    def add(self, task_ids, vectors):
+        """Appends the (normalized) `vectors` of `task_ids`."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        task_ids = np.asarray(task_ids, dtype=np.int64)
+        if len(vectors) != len(task_ids):
+            raise ValueError("Expected one vector per task_id")
+        if not len(task_ids):
+            return
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+        with self.lock:
+            if not os.path.exists(self.meta_path):
+                with open(self.meta_path, 'w', encoding='utf-8') as f:
+                    json.dump({'dim': vectors.shape[1]}, f)
+            self._refresh()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+            self._truncate_partial_rows()
+            # vectors first: a row only becomes visible once its task_id is written too
+            with open(self.vectors_path, 'ab') as f:
+                f.write(vectors.tobytes())
+            with open(self.ids_path, 'ab') as f:
+                f.write(task_ids.tobytes())
+        self._refresh()
+
+    def _truncate_partial_rows(self):
+        # drops what an interrupted append left in only one of the files, so rows stay aligned
+        if not os.path.exists(self.vectors_path):
+            return
+        n = min(os.path.getsize(self.vectors_path) // (self.dim * 4), os.path.getsize(self.ids_path) // 8) \
+            if os.path.exists(self.ids_path) else 0
+        for path, row_size in [(self.vectors_path, self.dim * 4), (self.ids_path, 8)]:
+            if os.path.exists(path) and os.path.getsize(path) != n * row_size:
+                logging.warning("Truncating partially written rows of %s", path)
+                os.truncate(path, n * row_size)
+
+    @timed('similar_tasks')
+    def top_k(self, vector, k=TOP_K, exclude=(), min_score=None):
+        """
+        The `k` indexed tasks most similar to `vector` (cosine), best first,
+        as (task_ids, scores); `exclude` task_ids are skipped.
+        """
+        self._refresh()
+        if not len(self._rows) or vector is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if not norm:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        scores = self._vectors @ (vector / norm)
+        scores[~self._live] = -np.inf
+        if len(exclude):
+            scores[np.isin(self._ids, np.asarray(exclude, dtype=np.int64))] = -np.inf
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        best = best[np.isfinite(scores[best]) if min_score is None else scores[best] >= min_score]
+        return self._ids[best], scores[best]
+
+    def similar(self, text, k=TOP_K, min_score=None):
+        """Indexed tasks most similar to a new task's "title. description" `text`."""
+        return self.top_k(embed_batch([text])[0], k, min_score=min_score)
+
+    def similar_to_task(self, task_id, k=TOP_K, min_score=None):
+        """Indexed tasks most similar to the indexed task `task_id` (itself excluded)."""
+        return self.top_k(self.vector(task_id), k, exclude=[task_id], min_score=min_score)
+
+    def add_tasks(self, df):
+        """Embeds and appends the tasks of `df` (task_id, title, description)."""
+        for start in range(0, len(df), EMBED_CHUNK_SIZE):
+            chunk = df.iloc[start:start + EMBED_CHUNK_SIZE]
+            self.add(chunk['task_id'].to_numpy(dtype=np.int64), embed_batch(task_texts(chunk)))
+
+    def sync(self, df):
+        """Indexes the tasks of `df` that aren't indexed yet and returns how many were added."""
+        missing = df[~df['task_id'].isin(self.task_ids())]
+        self.add_tasks(missing)
+        logging.info("Indexed %s new tasks in %s (%s in total).", len(missing), self.vectors_path, len(self))
+        return len(missing)
+
+
+def get_task_index(dataset_path=DATASET_PATH):
+    """The process-wide embedding index kept next to the task table at `dataset_path`."""
+    base_path = os.path.splitext(os.path.abspath(dataset_path))[0]
+    with _indexes_lock:
+        if base_path not in _indexes:
+            _indexes[base_path] = TaskEmbeddingIndex(base_path)
+        return _indexes[base_path]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed the tasks that are missing from the similar-task index.")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="task table (CSV / Parquet / SQLite)")
+    args = parser.parse_args()
+    # streamed, so archived tasks are covered without loading them
+    df_mgr = DataFrameManager(args.dataset, columns=['task_id'])
+    task_index = get_task_index(args.dataset)
+    added = sum(task_index.sync(chunk) for chunk in df_mgr.iter_chunks(EMBED_CHUNK_SIZE * 10,
+                                                                       ['task_id', 'title', 'description']))
+    print(f"Indexed {added} new tasks.")
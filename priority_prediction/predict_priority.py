@@ -3,39 +3,44 @@ import numpy as np
 import warnings
 warnings.filterwarnings("ignore")
 from logger_n_exception.logger import logging
+from logger_n_exception.metrics import timed
+from model_registry.registry import load_native_or_pickle
+from model_registry.native import NativeBoosterPipeline
+from feature_engineering.task_features import task_features
+
+MODEL_PATH = 'priority_prediction/priority_predictor.pkl'
+NATIVE_MODEL_PATH = 'priority_prediction/priority_predictor.json'
+PRIORITIES = np.array(["Low", "Medium", "High", "Critical"])
+
+
+def load_priority_model():
+    """The exported booster when available, the pickled pipeline otherwise."""
+    return load_native_or_pickle(NATIVE_MODEL_PATH, NativeBoosterPipeline.load, MODEL_PATH)
+
+
+@timed('predict_batch', model='priority')
+def predict_priority_batch(task_data):
+    """Predicts the priority label of every row of `task_data` in one model call."""
+    xgb_pipe = load_priority_model()
+
+    features = task_features(task_data, xgb_pipe.feature_names_in_.tolist())
+    priority_prediction = xgb_pipe.predict(features)
+    logging.info("Predicted priority for %s tasks.", len(priority_prediction))
+
+    return PRIORITIES[priority_prediction]
 
-import pickle
 
 def predict_priority(task_data):
     """Predicts the priority of a task based on its features."""
 
-    priorities = {0: "Low", 1: "Medium", 2: "High", 3: "Critical"}
-    
     try:
-        # Load the pre-trained model and transformers
-        with open('priority_prediction\priority_predictor.pkl', 'rb') as f:
-            xgb_pipe = pickle.load(f)
+        priority_prediction = predict_priority_batch(task_data)
+        logging.info("Predicted priority: %s.", priority_prediction[0])
     except FileNotFoundError:
         logging.error("Priority prediction model file not found. Ensure the model is trained and saved correctly.")
         return "Model not found"
-    
-    task_data['created_at'] = pd.to_datetime(task_data['created_at'])
-    task_data['due_date'] = pd.to_datetime(task_data['due_date'])
-    
-    task_data['created_dow'] = task_data['created_at'].dt.dayofweek
-    task_data['expected_days'] = (task_data['due_date'] - task_data['created_at']).dt.days
-    task_data['is_overdue'] = (task_data['due_date'] < pd.Timestamp.now()).astype(int)
-    task_data['hours_per_day'] = task_data['estimated_hours'] / task_data['expected_days'].replace(0, 1) # Avoid division by zero
-
-    required_featuers = xgb_pipe.feature_names_in_.tolist()
-    
-    # Predict priority
-    try:
-        priority_prediction = xgb_pipe.predict(task_data[required_featuers])
-        logging.info(f"Predicted priority: {priority_prediction[0]} for task data: {task_data.to_dict()}")
     except Exception as e:
-        logging.error(f"Error during priority prediction: {e}")
+        logging.error("Error during priority prediction: %s", e)
         return "Prediction error"
 
-    return priorities[priority_prediction[0]]
-
+    return priority_prediction[0]
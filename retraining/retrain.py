@@ -0,0 +1,254 @@
+import os
+import re
+import glob
+import json
+import pickle
+import argparse
+from logger_n_exception.logger import logging
+import pandas as pd
+import numpy as np
+
+from dataframe_manager.manage_dataframe import DataFrameManager, DATASET_PATH
+from feature_engineering.task_features import task_features, task_dates
+from model_registry.native import NativeBoosterPipeline
+from model_registry.export import export_booster_pipeline
+from hours_estimatror.estimate_hours import MODEL_PATH as HOURS_MODEL_PATH, NATIVE_MODEL_PATH as HOURS_SPEC_PATH
+from priority_prediction.predict_priority import (MODEL_PATH as PRIORITY_MODEL_PATH,
+                                                  NATIVE_MODEL_PATH as PRIORITY_SPEC_PATH, PRIORITIES)
+from nlp.nlp import preprocess_batch, predict_trained_text, ONLINE_TEXT_MODELS_PATH
+from nlp.online_text import OnlineTextClassifiers
+
+# boosting rounds added to each XGBoost model per update
+ROUNDS_PER_UPDATE = 20
+# fewer newly completed tasks than this are left for the next run
+MIN_NEW_TASKS = 20
+# versioned artifacts kept next to the live one (older ones are deleted)
+KEEP_VERSIONS = 3
+TRAINING_COLUMNS = ['task_id', 'title', 'created_at', 'due_date', 'status', 'description',
+                    'category', 'type', 'priority', 'estimated_hours']
+TEXT_CLASSES = {
+    'category': ['Design', 'Development', 'Research', 'Testing'],
+    'type': ['Bug', 'Epic', 'Story', 'Task'],
+}
+# tasks are predicted when they are created, as "To Do" (see predict_tasks)
+NEW_TASK_STATUS = "To Do"
+# every HOLDOUT_EVERY-th task_id is kept out of the online text models, to compare them with the trained ones
+HOLDOUT_EVERY = 5
+# shuffled passes over the labelled history when the online text models are first built
+BOOTSTRAP_EPOCHS = 5
+
+
+def _state_paths(dataset_path):
+    base = os.path.splitext(dataset_path)[0]
+    return f"{base}_retrain_state.json", f"{base}_retrained_ids.npy"
+
+
+def load_state(dataset_path=DATASET_PATH):
+    """Last artifact version and the task_ids the models were already updated with."""
+    state_path, ids_path = _state_paths(dataset_path)
+    state = {'version': 0}
+    if os.path.exists(state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    trained_ids = np.load(ids_path) if os.path.exists(ids_path) else np.array([], dtype=np.int64)
+    return state, trained_ids
+
+
+def save_state(state, trained_ids, dataset_path=DATASET_PATH):
+    state_path, ids_path = _state_paths(dataset_path)
+    with open(f"{ids_path}.tmp", 'wb') as f:
+        np.save(f, np.unique(trained_ids).astype(np.int64))
+    os.replace(f"{ids_path}.tmp", ids_path)
+    with open(f"{state_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(f"{state_path}.tmp", state_path)
+
+
+def _versioned_path(live_path, version, ext):
+    return f"{os.path.splitext(live_path)[0]}.v{version}{ext}"
+
+
+def _prune_versions(live_path, ext, keep=KEEP_VERSIONS):
+    pattern = re.compile(re.escape(os.path.splitext(live_path)[0]) + r"\.v(\d+)" + re.escape(ext) + "$")
+    versions = sorted((int(m.group(1)), path) for path in glob.glob(f"{os.path.splitext(live_path)[0]}.v*{ext}")
+                      if (m := pattern.match(path)))
+    for _, path in versions[:-keep]:
+        os.remove(path)
+
+
+def build_booster(spec_path, pickle_path, tasks, labels, version, rounds=ROUNDS_PER_UPDATE):
+    """
+    Continues boosting the live model at `spec_path` on `tasks` into a new
+    versioned booster file and returns its spec; `swap_spec` makes it live.
+    The fitted preprocessing is kept as it is, so old and new trees see the
+    same feature encoding, and the tasks are featurized as they were when
+    created (status "To Do", is_overdue at created_at), like the tasks the
+    model predicts for.
+    """
+    import xgboost as xgb
+    if not os.path.exists(spec_path):
+        export_booster_pipeline(pickle_path, spec_path)
+    model = NativeBoosterPipeline.load(spec_path)
+
+    # the features the model predicted from: the task as created, not as completed
+    created_at, _ = task_dates(tasks)
+    features = task_features(tasks.assign(status=NEW_TASK_STATUS), model.feature_names_in_.tolist(), now=created_at)
+    params = {'objective': model.spec['objective']}
+    if params['objective'].startswith('multi:'):
+        config = json.loads(model.booster.save_config())
+        params['num_class'] = int(config['learner']['learner_model_param']['num_class'])
+    booster = xgb.train(params, xgb.DMatrix(model.transform(features), label=labels),
+                        num_boost_round=rounds, xgb_model=model.booster)
+
+    booster_path = _versioned_path(spec_path, version, '.ubj')
+    booster.save_model(booster_path)
+    logging.info("Added %s boosting rounds to %s from %s tasks (%s rounds).", rounds, spec_path, len(tasks), booster.num_boosted_rounds())
+    return dict(model.spec, booster=os.path.basename(booster_path))
+
+
+def swap_spec(spec_path, spec):
+    with open(f"{spec_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(spec, f, indent=1)
+    # running processes pick the new spec up through the model registry
+    os.replace(f"{spec_path}.tmp", spec_path)
+    _prune_versions(spec_path, '.ubj')
+
+
+def _text_tasks(tasks):
+    """The tasks with known category / type labels and their title + description texts."""
+    tasks = tasks[tasks['category'].isin(TEXT_CLASSES['category']) & tasks['type'].isin(TEXT_CLASSES['type'])]
+    task_descs = tasks['title'].fillna("").astype(str) + ". " + tasks['description'].fillna("").astype(str)
+    return tasks, task_descs.tolist()
+
+
+def _is_holdout(tasks):
+    return tasks['task_id'].to_numpy(dtype=np.int64) % HOLDOUT_EVERY == 0
+
+
+def _labels(tasks):
+    return {name: tasks[name].astype(str).to_numpy() for name in TEXT_CLASSES}
+
+
+def _accuracy(predictions, tasks):
+    return {name: float(np.mean(np.asarray(predictions[name], dtype=object) == labels))
+            for name, labels in _labels(tasks).items()}
+
+
+def bootstrap_text_models(history, epochs=BOOTSTRAP_EPOCHS):
+    """Online text classifiers fitted on the labelled tasks of `history` (holdout excluded), in `epochs` passes."""
+    tasks, texts = _text_tasks(history[~_is_holdout(history)])
+    cleaned = np.asarray(preprocess_batch(texts), dtype=object)
+    labels = _labels(tasks)
+    text_models = OnlineTextClassifiers(TEXT_CLASSES)
+    rng = np.random.default_rng(0)
+    for _ in range(epochs):
+        order = rng.permutation(len(cleaned))
+        text_models.partial_fit(cleaned[order].tolist(), {name: values[order] for name, values in labels.items()})
+    logging.info("Built the online text models from %s labelled tasks.", len(tasks))
+    return text_models
+
+
+def _write_pickle(obj, file_path):
+    with open(f"{file_path}.tmp", 'wb') as f:
+        pickle.dump(obj, f)
+    os.replace(f"{file_path}.tmp", file_path)
+
+
+def _candidate_path(file_path):
+    return f"{os.path.splitext(file_path)[0]}.candidate.pkl"
+
+
+def build_text_models(tasks, history, file_path=ONLINE_TEXT_MODELS_PATH):
+    """
+    partial_fits a copy of the candidate online text classifiers on `tasks`
+    (built from the whole labelled `history` on first use) and scores them
+    and the trained TF-IDF models on the holdout tasks of `history`.
+    Returns (text_models, scores); `swap_text_models` stores them.
+    """
+    candidate_path = _candidate_path(file_path)
+    if os.path.exists(candidate_path):
+        with open(candidate_path, 'rb') as f:
+            text_models = pickle.load(f)
+        tasks, texts = _text_tasks(tasks[~_is_holdout(tasks)])
+        if len(tasks):
+            text_models.partial_fit(preprocess_batch(texts), _labels(tasks))
+    else:
+        text_models = bootstrap_text_models(history)
+
+    holdout, texts = _text_tasks(history[_is_holdout(history)])
+    cleaned = preprocess_batch(texts)
+    scores = {'holdout': len(holdout), 'online': _accuracy(text_models.predict(cleaned), holdout),
+              'trained': _accuracy(predict_trained_text(cleaned), holdout)}
+    promote = len(holdout) > 0 and all(scores['online'][name] >= scores['trained'][name] for name in TEXT_CLASSES)
+    scores['serving'] = 'online' if promote else 'trained'
+    logging.info("Online text models (%s tasks seen) on %s holdout tasks: %s, trained models: %s; serving the %s ones.",
+                 text_models.n_samples, len(holdout), scores['online'], scores['trained'], scores['serving'])
+    return text_models, scores
+
+
+def swap_text_models(text_models, scores, version, file_path=ONLINE_TEXT_MODELS_PATH):
+    """
+    Stores the candidate online text classifiers and serves them from
+    `file_path` only while they are at least as accurate as the trained
+    TF-IDF models on the holdout (see build_text_models); otherwise the
+    trained models keep serving.
+    """
+    candidate_path = _candidate_path(file_path)
+    with open(_versioned_path(candidate_path, version, '.pkl'), 'wb') as f:
+        pickle.dump(text_models, f)
+    _write_pickle(text_models, candidate_path)
+    _prune_versions(candidate_path, '.pkl')
+    if scores['serving'] == 'online':
+        # a private copy: the registry's instance may be serving predictions
+        _write_pickle(text_models, file_path)
+    elif os.path.exists(file_path):
+        os.remove(file_path)
+
+
+def retrain(dataset_path=DATASET_PATH, rounds=ROUNDS_PER_UPDATE, min_new=MIN_NEW_TASKS):
+    """
+    Updates the hours, priority and text models with the tasks completed
+    since the last run. Returns the number of tasks used (0 when there were
+    fewer than `min_new`).
+
+    Every model is built before any goes live, and the state is saved right
+    after the swap, so a failing step leaves the live models and the state
+    untouched and the next run retries with the same tasks.
+    """
+    state, trained_ids = load_state(dataset_path)
+    # also reads the completed tasks already moved to the archive
+    history = DataFrameManager(dataset_path, columns=TRAINING_COLUMNS).filter_tasks(include_archive=True)
+    df = history[history['status'] == 'Completed']
+    new_tasks = df[~df['task_id'].isin(trained_ids)]
+    if len(new_tasks) < min_new:
+        logging.info("%s newly completed tasks, waiting for at least %s.", len(new_tasks), min_new)
+        return 0
+
+    version = state['version'] + 1
+    hours = new_tasks[new_tasks['estimated_hours'].notna()]
+    hours_spec = build_booster(HOURS_SPEC_PATH, HOURS_MODEL_PATH, hours,
+                               hours['estimated_hours'].to_numpy(dtype=float), version, rounds)
+    priority_index = {label: i for i, label in enumerate(PRIORITIES)}
+    prioritized = new_tasks[new_tasks['priority'].isin(PRIORITIES)]
+    priority_spec = build_booster(PRIORITY_SPEC_PATH, PRIORITY_MODEL_PATH, prioritized,
+                                  prioritized['priority'].map(priority_index).to_numpy(dtype=float), version, rounds)
+    text_models, text_scores = build_text_models(new_tasks, history)
+
+    swap_spec(HOURS_SPEC_PATH, hours_spec)
+    swap_spec(PRIORITY_SPEC_PATH, priority_spec)
+    swap_text_models(text_models, text_scores, version)
+
+    save_state({'version': version, 'updated_at': pd.Timestamp.now().isoformat(), 'tasks': len(new_tasks),
+                'text_models': text_scores},
+               np.concatenate([trained_ids, new_tasks['task_id'].to_numpy(dtype=np.int64)]), dataset_path)
+    logging.info("Retraining v%s done with %s newly completed tasks.", version, len(new_tasks))
+    return len(new_tasks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally update the models with newly completed tasks.")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="task table (CSV / Parquet / SQLite)")
+    parser.add_argument("--rounds", type=int, default=ROUNDS_PER_UPDATE, help="boosting rounds added per update")
+    parser.add_argument("--min-new", type=int, default=MIN_NEW_TASKS, help="minimum newly completed tasks")
+    args = parser.parse_args()
+    print(f"Updated the models with {retrain(args.dataset, args.rounds, args.min_new)} newly completed tasks.")
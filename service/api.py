@@ -0,0 +1,357 @@
+import io
+import json
+import base64
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
+from logger_n_exception.logger import logging
+from logger_n_exception.metrics import render_metrics
+import pandas as pd
+import numpy as np
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from dataframe_manager.manage_dataframe import DataFrameManager, PAGE_SIZE, SORT_COLUMNS
+from dataframe_manager.storage import TASK_COLUMNS, DATE_COLUMNS
+from nlp.nlp import warm_up, nlp_status
+from nlp.task_index import get_task_index
+from priority_prediction.predict_priority import load_priority_model
+from hours_estimatror.estimate_hours import load_hours_model
+from assigneed_to.suggest_assignee import suggest_assignee
+from task_pipeline.predict_tasks import predict_tasks
+from task_pipeline.coalescer import PredictionCoalescer
+from task_pipeline.bulk_io import import_tasks, export_chunks, FILE_FORMATS, PENDING_COLUMNS
+from task_pipeline.background import PENDING
+from feature_engineering.task_features import expected_days
+
+# Headless HTTP API over the task store and the models, run from the repo root:
+#   uvicorn service.api:app --workers 4
+# Every worker process keeps its own warm models and shared task snapshot;
+# writes go through the change log, so each worker sees the others' writes.
+
+FILTER_COLUMNS = ['status', 'category', 'type', 'priority', 'assignee']
+EDITABLE_COLUMNS = [col for col in TASK_COLUMNS if col != 'task_id']
+PREDICTED_COLUMNS = ['category', 'type', 'estimated_hours', 'priority']
+MAX_PAGE_SIZE = 1000
+# uploaded import files larger than this are spooled to a temporary file
+IMPORT_SPOOL_SIZE = 16 * 1024 * 1024
+EXPORT_MEDIA_TYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+_df_mgr = None
+_coalescer = None
+
+
+class InvalidRequest(Exception):
+    """Bad client input, answered with a 400."""
+
+
+async def get_manager():
+    """
+    The worker's task store, refreshed (off the event loop) when another
+    worker / session wrote to it.
+    """
+    await run_in_threadpool(_df_mgr.refresh)
+    return _df_mgr
+
+
+def _unavailable(exc):
+    logging.error("Service unavailable: %s", exc)
+    return HTTPException(503, "Service temporarily unavailable")
+
+
+def _lookup(df_mgr, task_id):
+    """The task with `task_id` as a one-row DataFrame (404 if it does not exist)."""
+    try:
+        return df_mgr.get_task(task_id)
+    except KeyError:
+        raise HTTPException(404, f"Task {task_id} not found")
+
+
+async def _write(func, *args, **kwargs):
+    """Runs a task store write in the thread pool."""
+    try:
+        return await run_in_threadpool(func, *args, **kwargs)
+    except TimeoutError as exc:
+        # the change-log lock could not be taken
+        raise _unavailable(exc)
+
+
+async def _predict(tasks):
+    """Predicts `tasks`; single-task requests are micro-batched with concurrent ones."""
+    try:
+        if len(tasks) == 1:
+            return await asyncio.wrap_future(_coalescer.submit(tasks))
+        return await run_in_threadpool(predict_tasks, tasks)
+    except OSError as exc:
+        # missing model / spaCy files
+        raise _unavailable(exc)
+
+
+def _records(df, headers=None):
+    return Response(df.to_json(orient='records', date_format='iso'), media_type='application/json', headers=headers)
+
+
+def _encode_cursor(cursor):
+    """Opaque URL-safe form of a page_tasks cursor."""
+    value, task_id = cursor
+    value = None if pd.isna(value) else (value.isoformat() if isinstance(value, pd.Timestamp) else int(value))
+    return base64.urlsafe_b64encode(json.dumps([value, task_id]).encode()).decode()
+
+
+def _decode_cursor(text, sort_by):
+    try:
+        value, task_id = json.loads(base64.urlsafe_b64decode(text.encode()))
+        if sort_by in DATE_COLUMNS:
+            value = pd.NaT if value is None else pd.Timestamp(value)
+        return value, int(task_id)
+    except (ValueError, TypeError):
+        raise InvalidRequest("Invalid cursor")
+
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except json.JSONDecodeError:
+        raise InvalidRequest("Request body must be JSON")
+
+
+def _tasks_frame(payload):
+    """Validates one task (dict) or a list of tasks and returns them as a DataFrame."""
+    rows = payload if isinstance(payload, list) else [payload]
+    if not rows or not all(isinstance(row, dict) for row in rows):
+        raise InvalidRequest("Expected a task object or a non-empty list of task objects")
+    tasks = pd.DataFrame(rows)
+    unknown = set(tasks.columns) - set(EDITABLE_COLUMNS)
+    if unknown:
+        raise InvalidRequest(f"Unknown task fields: {sorted(unknown)}")
+    if 'due_date' not in tasks or tasks['due_date'].isna().any():
+        raise InvalidRequest("due_date is required")
+
+    for col in ['title', 'description']:
+        tasks[col] = tasks[col].fillna("") if col in tasks else ""
+    if ((tasks['title'] == "") & (tasks['description'] == "")).any():
+        raise InvalidRequest("title or description is required")
+    if 'created_at' not in tasks:
+        tasks['created_at'] = pd.Timestamp.now().normalize()
+    for col in DATE_COLUMNS:
+        tasks[col] = pd.to_datetime(tasks[col], errors='coerce', format='ISO8601')
+        if tasks[col].isna().any():
+            raise InvalidRequest(f"{col} must be an ISO 8601 date")
+    if (expected_days(tasks['created_at'], tasks['due_date']) <= 0).any():
+        raise InvalidRequest("due_date must be after created_at")
+    if 'status' not in tasks:
+        tasks['status'] = "To Do"
+    if 'estimated_hours' not in tasks:
+        tasks['estimated_hours'] = 0
+    return tasks
+
+
+async def health(request):
+    df_mgr = await get_manager()
+    return JSONResponse({'models': nlp_status(), 'tasks': len(df_mgr.df), 'version': df_mgr.version})
+
+
+async def list_tasks(request):
+    """
+    GET /tasks?status=To Do&assignee=&search=login&columns=task_id,title
+
+    With ?limit=N the tasks are paged (sorted by ?sort=task_id|created_at|due_date,
+    ?order=desc for descending): the X-Total-Count header holds the number
+    of matches and X-Next-Cursor, when present, the ?cursor= of the next page.
+    """
+    params = request.query_params
+    # an empty value selects missing ones, e.g. ?assignee= for unassigned tasks
+    filters = {col: (params[col] or None) for col in FILTER_COLUMNS if col in params}
+    columns = [col for col in params['columns'].split(',') if col] if params.get('columns') else None
+    if columns:
+        unknown = set(columns) - set(TASK_COLUMNS)
+        if unknown:
+            raise InvalidRequest(f"Unknown task columns: {sorted(unknown)}")
+    df_mgr = await get_manager()
+    if 'limit' not in params and 'cursor' not in params:
+        tasks = await run_in_threadpool(df_mgr.filter_tasks, filters, params.get('search'), columns)
+        return _records(tasks)
+
+    try:
+        limit = int(params.get('limit', PAGE_SIZE))
+    except ValueError:
+        raise InvalidRequest("limit must be an integer")
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise InvalidRequest(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    sort_by = params.get('sort', 'task_id')
+    if sort_by not in SORT_COLUMNS:
+        raise InvalidRequest(f"sort must be one of {SORT_COLUMNS}")
+    after = _decode_cursor(params['cursor'], sort_by) if params.get('cursor') else None
+    tasks, next_cursor, total = await run_in_threadpool(
+        lambda: df_mgr.page_tasks(filters, params.get('search'), sort_by, params.get('order') == 'desc', after,
+                                  limit, columns))
+    headers = {'X-Total-Count': str(total)}
+    if next_cursor is not None:
+        headers['X-Next-Cursor'] = _encode_cursor(next_cursor)
+    return _records(tasks, headers)
+
+
+async def create_tasks(request):
+    """
+    POST /tasks with one task or a list of tasks. Unless ?predict=false the
+    category, type, hours and priority are predicted, like in the app;
+    otherwise missing category / type / priority are stored as PENDING.
+    """
+    tasks = _tasks_frame(await _json_body(request))
+    if request.query_params.get('predict', 'true').lower() != 'false':
+        tasks = await _predict(tasks)
+    else:
+        for col in PENDING_COLUMNS:
+            tasks[col] = tasks[col].fillna(PENDING) if col in tasks else PENDING
+    task_ids = await _write((await get_manager()).create_tasks, tasks)
+    return _records(tasks.assign(task_id=task_ids))
+
+
+def _file_format(request):
+    fmt = request.query_params.get('format', 'csv')
+    if fmt not in FILE_FORMATS:
+        raise InvalidRequest(f"format must be one of {FILE_FORMATS}")
+    return fmt
+
+
+async def import_tasks_file(request):
+    """
+    POST /tasks/import?format=csv|jsonl with the file as the request body.
+    Rows are validated, de-duplicated by task_id and appended in chunks;
+    missing category, type, hours and priority are predicted unless
+    ?predict=false. Returns the import counts.
+    """
+    fmt = _file_format(request)
+    predict = request.query_params.get('predict', 'true').lower() != 'false'
+    df_mgr = await get_manager()
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as spool:
+        async for block in request.stream():
+            spool.write(block)
+        spool.seek(0)
+        src = io.TextIOWrapper(spool, encoding='utf-8', newline='')
+        try:
+            counts = await _write(import_tasks, src, df_mgr, fmt=fmt, predict=predict)
+        except (pd.errors.ParserError, UnicodeDecodeError) as exc:
+            raise InvalidRequest(f"Unreadable {fmt} file: {exc}")
+    return JSONResponse(counts)
+
+
+async def export_tasks_file(request):
+    """GET /tasks/export?format=csv|jsonl&columns=task_id,title streams the whole table in chunks."""
+    fmt = _file_format(request)
+    columns = [col for col in request.query_params['columns'].split(',') if col] \
+        if request.query_params.get('columns') else None
+    if columns and set(columns) - set(TASK_COLUMNS):
+        raise InvalidRequest(f"Unknown task columns: {sorted(set(columns) - set(TASK_COLUMNS))}")
+    # a sync generator is iterated in the thread pool by StreamingResponse
+    return StreamingResponse(export_chunks(await get_manager(), fmt=fmt, columns=columns),
+                             media_type=EXPORT_MEDIA_TYPES[fmt],
+                             headers={'Content-Disposition': f'attachment; filename="tasks.{fmt}"'})
+
+
+async def get_task(request):
+    df_mgr = await get_manager()
+    task = await run_in_threadpool(_lookup, df_mgr, request.path_params['task_id'])
+    return _records(task)
+
+
+async def update_task(request):
+    """PATCH /tasks/{task_id} with the fields to change."""
+    task_id = request.path_params['task_id']
+    fields = await _json_body(request)
+    if not isinstance(fields, dict) or not fields:
+        raise InvalidRequest("Expected an object with the fields to update")
+    unknown = set(fields) - set(EDITABLE_COLUMNS)
+    if unknown:
+        raise InvalidRequest(f"Unknown task fields: {sorted(unknown)}")
+    for col in DATE_COLUMNS:
+        if col in fields:
+            try:
+                fields[col] = pd.to_datetime(fields[col], format='ISO8601')
+            except (ValueError, TypeError):
+                raise InvalidRequest(f"{col} must be an ISO 8601 date")
+    df_mgr = await get_manager()
+    await run_in_threadpool(_lookup, df_mgr, task_id)
+    await _write(df_mgr.update_task, task_id, **fields)
+    return _records(await run_in_threadpool(_lookup, df_mgr, task_id))
+
+
+async def complete_task(request):
+    task_id = request.path_params['task_id']
+    df_mgr = await get_manager()
+    await run_in_threadpool(_lookup, df_mgr, task_id)
+    await _write(df_mgr.complete_task, task_id)
+    return _records(await run_in_threadpool(_lookup, df_mgr, task_id))
+
+
+def _suggest(df_mgr, task_id):
+    task = _lookup(df_mgr, task_id).iloc[0]
+    assignees = df_mgr.df['assignee'].dropna().unique().tolist()
+    return suggest_assignee(df_mgr.df, task['category'], task['type'], task['task_id'], assignees,
+                            df_mgr.assignee_index, get_task_index(df_mgr.file_path), df_mgr.archive)
+
+
+async def suggest_task_assignee(request):
+    """GET /tasks/{task_id}/assignee-suggestion"""
+    task_id = request.path_params['task_id']
+    assignee = await run_in_threadpool(_suggest, await get_manager(), task_id)
+    return JSONResponse({'task_id': task_id, 'assignee': assignee})
+
+
+async def predict(request):
+    """
+    POST /predict with one task or a list of tasks; a list is predicted as
+    one batch, single tasks are batched with concurrent requests. Nothing is
+    stored.
+    """
+    payload = await _json_body(request)
+    tasks = await _predict(_tasks_frame(payload))
+    predictions = tasks[PREDICTED_COLUMNS].to_dict('records')
+    return JSONResponse(predictions if isinstance(payload, list) else predictions[0])
+
+
+async def metrics(request):
+    """GET /metrics in the Prometheus text format (per worker process)."""
+    return PlainTextResponse(render_metrics(), media_type='text/plain; version=0.0.4')
+
+
+async def bad_request(request, exc):
+    return JSONResponse({'error': str(exc)}, status_code=400)
+
+
+async def http_error(request, exc):
+    return JSONResponse({'error': exc.detail}, status_code=exc.status_code, headers=exc.headers)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global _df_mgr, _coalescer
+    _df_mgr = DataFrameManager(shared=True, compact_dtypes=True)
+    _coalescer = PredictionCoalescer()
+    warm_up(extra_models=[load_hours_model, load_priority_model])
+    logging.info("Task service started.")
+    yield
+    _coalescer.close()
+
+
+routes = [
+    Route('/health', health),
+    Route('/metrics', metrics),
+    Route('/tasks', list_tasks, methods=['GET']),
+    Route('/tasks', create_tasks, methods=['POST']),
+    Route('/tasks/import', import_tasks_file, methods=['POST']),
+    Route('/tasks/export', export_tasks_file, methods=['GET']),
+    Route('/tasks/{task_id:int}', get_task, methods=['GET']),
+    Route('/tasks/{task_id:int}', update_task, methods=['PATCH']),
+    Route('/tasks/{task_id:int}/complete', complete_task, methods=['POST']),
+    Route('/tasks/{task_id:int}/assignee-suggestion', suggest_task_assignee, methods=['GET']),
+    Route('/predict', predict, methods=['POST']),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan, exception_handlers={
+    InvalidRequest: bad_request,
+    HTTPException: http_error,
+})
@@ -0,0 +1,77 @@
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logger_n_exception.logger import logging
+from logger_n_exception.metrics import timed
+import pandas as pd
+
+from dataframe_manager.manage_dataframe import DataFrameManager
+from task_pipeline.predict_tasks import predict_tasks
+
+# placeholder for category / type / priority until the prediction lands
+PENDING = "Pending"
+PREDICTED_COLUMNS = ['category', 'type', 'estimated_hours', 'priority']
+PREDICTION_WORKERS = 2
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide prediction worker pool, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PREDICTION_WORKERS, thread_name_prefix="prediction")
+        return _executor
+
+
+def worker_manager(df_mgr):
+    """
+    A manager of the same table for a worker thread, so the worker never
+    writes through the one the caller keeps reading. A shared manager's copy
+    goes through the copy-on-write snapshot; a non-shared manager's table
+    is modified in place, so the worker gets its own manager reading from storage.
+    """
+    if df_mgr.shared:
+        return copy.copy(df_mgr)
+    return DataFrameManager(df_mgr.file_path, storage=df_mgr.storage, log_path=df_mgr.change_log.file_path,
+                            compact_every=df_mgr.compact_every, compact_dtypes=df_mgr.compact_dtypes,
+                            archive=df_mgr.archive is not None, index_tasks=df_mgr.index_tasks)
+
+
+@timed('background_prediction')
+def _predict_and_store(df_mgr, tasks):
+    try:
+        predicted = predict_tasks(tasks)
+        df_mgr.update_tasks({
+            task['task_id']: {col: task[col] for col in PREDICTED_COLUMNS}
+            for task in predicted.to_dict('records')
+        })
+    except Exception:
+        logging.exception("Background prediction failed for tasks %s", tasks['task_id'].tolist())
+        raise
+    logging.info("Background prediction stored for tasks %s", tasks['task_id'].tolist())
+    return predicted
+
+
+def create_tasks_async(df_mgr, tasks):
+    """
+    Stores `tasks` right away with PENDING category / type / priority and
+    predicts them on the worker pool, filling the fields in when done.
+
+    `tasks` needs the columns expected by predict_tasks except task_id, which
+    is allocated by DataFrameManager.create_tasks; estimated_hours is the
+    user's estimate and is stored as-is until the prediction replaces it.
+    Returns the new task_ids and a Future resolving to the predicted
+    DataFrame.
+
+    The worker writes through its own manager (see worker_manager); use a
+    shared manager (shared=True) so the results show up in every session's
+    snapshot without a reload.
+    """
+    if not isinstance(tasks, pd.DataFrame):
+        raise ValueError("Tasks must be a pandas DataFrame")
+    task_ids = df_mgr.create_tasks(tasks.assign(category=PENDING, type=PENDING, priority=PENDING))
+    tasks = tasks.assign(task_id=task_ids)
+    return task_ids, get_executor().submit(_predict_and_store, worker_manager(df_mgr), tasks)
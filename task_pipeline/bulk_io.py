@@ -0,0 +1,175 @@
+import os
+import argparse
+import tempfile
+from logger_n_exception.logger import logging
+from logger_n_exception.metrics import timed
+import pandas as pd
+import numpy as np
+
+from dataframe_manager.manage_dataframe import DataFrameManager, DATASET_PATH
+from dataframe_manager.storage import TASK_COLUMNS, coerce_task_dtypes
+from task_pipeline.predict_tasks import predict_tasks
+from task_pipeline.background import PREDICTED_COLUMNS, PENDING
+
+# rows read, validated, predicted and written at a time; bounds the memory of an import / export
+CHUNK_SIZE = 10000
+FILE_FORMATS = ('csv', 'jsonl')
+TEXT_COLUMNS = ['title', 'description', 'status', 'category', 'type', 'priority', 'assignee']
+# left as PENDING, like tasks awaiting their background prediction, when imported without predictions
+PENDING_COLUMNS = ['category', 'type', 'priority']
+
+
+def file_format(path, fmt=None):
+    """`fmt`, or the format implied by the extension of `path` (.jsonl / .ndjson are JSON lines, anything else CSV)."""
+    if fmt is None:
+        fmt = 'jsonl' if os.path.splitext(str(path))[1].lower() in ('.jsonl', '.ndjson') else 'csv'
+    if fmt not in FILE_FORMATS:
+        raise ValueError(f"File format must be one of {FILE_FORMATS}, not {fmt}")
+    return fmt
+
+
+def read_task_chunks(src, chunk_size=CHUNK_SIZE, fmt=None):
+    """Streams the rows of the CSV / JSON-lines `src` (path or text file object) as DataFrames of up to `chunk_size` rows."""
+    if file_format(src, fmt) == 'jsonl':
+        reader = pd.read_json(src, lines=True, chunksize=chunk_size, dtype=False, convert_dates=False)
+    else:
+        reader = pd.read_csv(src, chunksize=chunk_size, dtype=str)
+    with reader:
+        yield from reader
+
+
+def validate_tasks(chunk):
+    """
+    Keeps the rows of `chunk` that can be stored: a title or description,
+    parseable created_at and due_date, a positive integer task_id (or none,
+    to get a new one) and a non-negative estimated_hours (or none, to have it
+    predicted). Unknown columns are dropped and a missing status becomes
+    "To Do". Returns (valid rows, number of rejected rows).
+    """
+    tasks = chunk.reindex(columns=TASK_COLUMNS)
+    for col in TEXT_COLUMNS:
+        tasks[col] = tasks[col].astype(object)
+        tasks[col] = tasks[col].mask(tasks[col].isna() | (tasks[col].astype(str).str.strip() == ""))
+    tasks = coerce_task_dtypes(tasks)
+
+    task_ids = pd.to_numeric(tasks['task_id'], errors='coerce')
+    hours = pd.to_numeric(tasks['estimated_hours'], errors='coerce')
+    valid = (tasks['title'].notna() | tasks['description'].notna()) \
+        & tasks['created_at'].notna() & tasks['due_date'].notna() \
+        & (tasks['task_id'].isna() | ((task_ids > 0) & (task_ids % 1 == 0))) \
+        & (tasks['estimated_hours'].isna() | (hours >= 0))
+
+    tasks = tasks.assign(task_id=task_ids, estimated_hours=hours)[valid]
+    tasks['status'] = tasks['status'].fillna("To Do")
+    return tasks, int((~valid).sum())
+
+
+def predict_missing(tasks):
+    """
+    Fills in category, type, estimated_hours and priority where they are
+    missing, predicting the rows that need it as one batch. Given values are
+    kept. Returns (tasks, number of rows predicted).
+    """
+    missing = tasks[PREDICTED_COLUMNS].isna().any(axis=1)
+    if not missing.any():
+        return tasks, 0
+    predicted = predict_tasks(tasks[missing])
+    tasks = tasks.copy()
+    for col in PREDICTED_COLUMNS:
+        tasks.loc[missing, col] = tasks.loc[missing, col].fillna(predicted[col])
+    return tasks, int(missing.sum())
+
+
+@timed('import_tasks')
+def import_tasks(src, df_mgr, chunk_size=CHUNK_SIZE, fmt=None, predict=True):
+    """
+    Streams the tasks of the CSV / JSON-lines `src` into the table of
+    `df_mgr` chunk by chunk: each chunk is validated (see validate_tasks),
+    de-duplicated by task_id (the first occurrence wins and task_ids already
+    stored are skipped), completed with batched predictions (or, with
+    predict=False, PENDING category / type / priority) and appended through
+    DataFrameManager.append_tasks.
+
+    Rows without a task_id are held in a temporary file and appended last,
+    so the task_ids they get never collide with ones given further down the
+    file. Only one chunk is in memory at a time and `df_mgr` can be a
+    task_id projection (columns=['task_id']). Returns the counts of rows
+    read, imported, rejected, skipped as duplicates and predicted.
+    """
+    counts = dict.fromkeys(['read', 'imported', 'rejected', 'duplicates', 'predicted'], 0)
+    with tempfile.TemporaryFile('w+', encoding='utf-8', newline='') as without_ids:
+        for chunk in read_task_chunks(src, chunk_size, fmt):
+            tasks, rejected = validate_tasks(chunk)
+            # drop duplicates before predicting them; append_tasks checks again under the lock
+            taken = df_mgr.df['task_id'] if 'task_id' in df_mgr.df else pd.Series(dtype=np.int64)
+            duplicate = tasks['task_id'].notna() & (tasks['task_id'].isin(taken) | tasks['task_id'].duplicated())
+            tasks = tasks[~duplicate]
+            if predict:
+                tasks, predicted = predict_missing(tasks)
+                counts['predicted'] += predicted
+            else:
+                tasks = tasks.fillna({col: PENDING for col in PENDING_COLUMNS})
+            new = tasks['task_id'].isna()
+            if new.any():
+                tasks[new].to_csv(without_ids, header=without_ids.tell() == 0, index=False)
+            task_ids = df_mgr.append_tasks(tasks[~new])
+
+            counts['read'] += len(chunk)
+            counts['imported'] += len(task_ids)
+            counts['rejected'] += rejected
+            counts['duplicates'] += int(duplicate.sum()) + int((~new).sum()) - len(task_ids)
+            logging.info("Imported %s of %s rows (%s read so far)", len(task_ids), len(chunk), counts['read'])
+
+        without_ids.seek(0)
+        if without_ids.read(1):
+            without_ids.seek(0)
+            for tasks in pd.read_csv(without_ids, chunksize=chunk_size):
+                counts['imported'] += len(df_mgr.append_tasks(tasks))
+    logging.info("Import into %s done: %s", df_mgr.file_path, counts)
+    return counts
+
+
+def export_chunks(df_mgr, chunk_size=CHUNK_SIZE, fmt='csv', columns=None):
+    """The task table of `df_mgr` as CSV / JSON-lines text, one block per chunk (e.g. for a streaming response)."""
+    fmt = file_format(None, fmt)
+    header = None
+    for chunk in df_mgr.iter_chunks(chunk_size, columns):
+        if fmt == 'jsonl':
+            text = chunk.to_json(orient='records', lines=True, date_format='iso')
+            yield text if text.endswith("\n") or not text else text + "\n"
+        elif header is None:
+            header = list(chunk.columns)
+            yield chunk.to_csv(index=False)
+        else:
+            yield chunk.reindex(columns=header).to_csv(index=False, header=False)
+
+
+@timed('export_tasks')
+def export_tasks(dst, df_mgr, chunk_size=CHUNK_SIZE, fmt=None, columns=None):
+    """Streams the task table of `df_mgr` (change log applied) into the CSV / JSON-lines file `dst`."""
+    fmt = file_format(dst, fmt)
+    with open(dst, 'w', encoding='utf-8', newline='') as f:
+        for text in export_chunks(df_mgr, chunk_size, fmt, columns):
+            f.write(text)
+    logging.info("Exported %s to %s", df_mgr.file_path, dst)
+    return dst
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import / export tasks as CSV or JSON lines, in chunks.")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("path", help="file to import from / export to (.csv, .jsonl)")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="task table (CSV / SQLite to import into)")
+    parser.add_argument("--format", choices=FILE_FORMATS, help="defaults to the extension of path")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--no-predict", action="store_true", help="store missing category / type / priority as Pending and hours empty")
+    parser.add_argument("--columns", help="comma-separated columns to export")
+    args = parser.parse_args()
+
+    # only the task_ids are loaded: enough to de-duplicate and allocate new ones
+    df_mgr = DataFrameManager(args.dataset, columns=['task_id'])
+    if args.action == "import":
+        print(import_tasks(args.path, df_mgr, args.chunk_size, args.format, predict=not args.no_predict))
+    else:
+        print(export_tasks(args.path, df_mgr, args.chunk_size, args.format,
+                           args.columns.split(",") if args.columns else None))
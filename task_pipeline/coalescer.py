@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from logger_n_exception.logger import logging
+from logger_n_exception.metrics import observe, SIZE_BUCKETS
+import pandas as pd
+
+from task_pipeline.predict_tasks import predict_tasks
+
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 5
+
+_STOP = object()
+
+
+class PredictionCoalescer():
+    """
+    Micro-batches prediction requests.
+
+    `submit` queues the tasks of one request and returns a Future. A worker
+    thread waits up to `max_wait_ms` after the first queued request for more
+    to arrive (or until `max_batch_size` tasks are queued), runs them through
+    `predict_fn` as one batch and resolves every Future with its own rows.
+    If a batch fails, its requests are retried one by one so a single bad
+    task only fails its own request.
+    """
+    def __init__(self, predict_fn=predict_tasks, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="prediction-coalescer", daemon=True)
+        self._thread.start()
+
+    def __repr__(self):
+        return f"PredictionCoalescer(max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait * 1000:g})"
+
+    def submit(self, tasks):
+        """Queues a DataFrame of tasks; the Future resolves to their predicted rows."""
+        if not isinstance(tasks, pd.DataFrame):
+            raise ValueError("Tasks must be a pandas DataFrame")
+        future = Future()
+        self._queue.put((tasks, future))
+        return future
+
+    def close(self):
+        """Predicts what is already queued, then stops the worker thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self):
+        """Blocks for the first request, then gathers more until the batch is full or the wait is over."""
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)  # finish this batch first
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            batch = [(tasks, future) for tasks, future in batch if future.set_running_or_notify_cancel()]
+            if batch:
+                self._predict(batch)
+
+    def _predict(self, batch):
+        try:
+            tasks = pd.concat([tasks for tasks, _ in batch], ignore_index=True)
+            predicted = self.predict_fn(tasks)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            logging.warning("Batch of %s prediction requests failed (%s); retrying one by one.", len(batch), e)
+            for item in batch:
+                self._predict([item])
+            return
+
+        start = 0
+        for tasks, future in batch:
+            future.set_result(predicted.iloc[start:start + len(tasks)].reset_index(drop=True))
+            start += len(tasks)
+        observe('coalesced_batch_requests', len(batch), SIZE_BUCKETS)
+        logging.info("Predicted %s tasks from %s requests in one batch.", start, len(batch))
@@ -0,0 +1,43 @@
+import pandas as pd
+import numpy as np
+from logger_n_exception.logger import logging
+from logger_n_exception.metrics import timed, observe, SIZE_BUCKETS
+
+from nlp.nlp import predict_task_info_batch
+from hours_estimatror.estimate_hours import predict_hours_batch
+from priority_prediction.predict_priority import predict_priority_batch
+
+
+@timed('predict_tasks')
+def predict_tasks(df):
+    """
+    Predicts category, type, estimated_hours and priority for every row of `df`.
+
+    `df` needs title, description, created_at and due_date columns; status
+    defaults to "To Do" and estimated_hours to 0 (no user estimate) when
+    missing. Each model runs once over the whole frame, in the same order as
+    the single-task flow of app.py: category/type, then hours, then priority
+    from the predicted hours. Returns a new DataFrame.
+    """
+    if not isinstance(df, pd.DataFrame):
+        raise ValueError("Input must be a pandas DataFrame")
+
+    tasks = df.copy()
+    if tasks.empty:
+        for col in ['category', 'type', 'estimated_hours', 'priority']:
+            tasks[col] = pd.Series(dtype=float if col == 'estimated_hours' else object)
+        return tasks
+
+    if 'status' not in tasks:
+        tasks['status'] = "To Do"
+    if 'estimated_hours' not in tasks:
+        tasks['estimated_hours'] = 0
+
+    observe('predict_tasks_rows', len(tasks), SIZE_BUCKETS)
+    task_descs = tasks['title'].fillna("").astype(str) + ". " + tasks['description'].fillna("").astype(str)
+    tasks['category'], tasks['type'] = predict_task_info_batch(task_descs.tolist())
+    tasks['estimated_hours'] = predict_hours_batch(tasks)
+    tasks['priority'] = predict_priority_batch(tasks)
+
+    logging.info("Batch predicted %s tasks.", len(tasks))
+    return tasks
@@ -1,62 +1,123 @@
-import os
+import io
+import threading
 from logger_n_exception.logger import logging
+from logger_n_exception.metrics import span, inc
 
 import pandas as pd
 import numpy as np
+from cachetools import LRUCache
 import matplotlib.pyplot as plt
 import seaborn as sns
 sns.set_theme(style="darkgrid", palette="mako", rc={
     'axes.facecolor': (0,0,0,0), 'figure.facecolor': (0,0,0,0), 'axes.labelcolor': 'white', 'xtick.color': 'white', 'ytick.color': 'white'
     })
 
+CHART_COLUMNS = ['priority', 'category', 'type', 'status']
+# rendered charts kept across reruns / sessions, keyed by (cache_key, chart, params)
+PNG_CACHE_SIZE = 64
+
+_png_cache = LRUCache(maxsize=PNG_CACHE_SIZE)
+_png_cache_lock = threading.Lock()
+
+
 class VisualizationManager():
-    def __init__(self, df):
+    """
+    Task charts drawn from pre-aggregated counts.
+
+    The rows are grouped once by assignee + CHART_COLUMNS and every chart is
+    drawn from that count table. Pass a `cache_key` identifying the data
+    (e.g. (df_mgr.version, filters)) to reuse the rendered PNGs of `tasks_png`
+    / `workload_png` until the data or the selection changes.
+    """
+    def __init__(self, df, cache_key=None):
         if not isinstance(df, pd.DataFrame):
             raise ValueError("Input must be a pandas DataFrame")
         self.df = df
+        self.cache_key = cache_key
+        self._counts = None
         if self.df.empty:
             logging.warning("DataFrame is empty. No visualizations will be generated.")
-    
-    def plot_count(self, col, ax):
+
+    @property
+    def counts(self):
+        """Number of tasks per (assignee, priority, category, type, status), computed once."""
+        if self._counts is None:
+            cols = ['assignee'] + [col for col in CHART_COLUMNS if col in self.df]
+            self._counts = self.df.groupby(cols, observed=True, dropna=False).size()
+        return self._counts
+
+    def value_counts(self, col, assignee=None):
+        """Counts of `col` (optionally for one assignee), most frequent first."""
+        counts = self.counts
+        if assignee:
+            counts = counts[counts.index.get_level_values('assignee') == assignee]
+        counts = counts.groupby(level=col, observed=True).sum()
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def plot_count(self, col, ax, assignee=None):
         """
         Plots the distribution of task.
         """
-        sns.countplot(data=self.df, x=col, order=self.df[col].value_counts().index, ax=ax, palette='mako')
+        counts = self.value_counts(col, assignee)
+        ax.bar(counts.index.astype(str), counts.values, color=sns.color_palette('mako', len(counts)))
         ax.set_title(f'Distribution of {col}')
         ax.set_xlabel(f'Task {col}')
         ax.set_ylabel('Count')
         ax.tick_params(axis='x', rotation=45)
-    
+
     def plot_workload_per_assignee(self, display_col, assignee=None):
         """
         Plots the workload of each assignee.
         """
-        logging.info(f"Plotting workload per assignee for display column: {display_col}, assignee: {assignee}")
+        logging.info("Plotting workload per assignee for display column: %s, assignee: %s", display_col, assignee)
         fig, axes = plt.subplots(2, 2, figsize=(10, 10))
         axes = axes.flatten().tolist()
         for i, col in enumerate(display_col):
-            if assignee:
-                data = self.df[self.df['assignee'] == assignee][['assignee', col]]
-            else:
-                data = self.df[col]
-            workload = data[col].value_counts()
-            sns.countplot(data=data, x=col, ax=axes[i], order=workload.index, palette='mako')
+            self.plot_count(col, axes[i], assignee)
             axes[i].set_title(f'Workload of {assignee} : {col.upper()}')
             axes[i].set_xlabel('')
             axes[i].set_ylabel('Number of Tasks')
-            axes[i].tick_params(axis='x', rotation=45)
-        plt.tight_layout()
-        plt.show()
+        fig.tight_layout()
         return fig
-    
+
     def plot_tasks(self):
         fig, axes = plt.subplots(2, 2, figsize=(10, 10))
         axes = axes.flatten().tolist()
-        for i, col in enumerate(['priority', 'category', 'type', 'status']):
+        for i, col in enumerate(CHART_COLUMNS):
             self.plot_count(col, ax=axes[i])
-            logging.info(f"Plotted count for {col}")
-            plt.tight_layout()
-        plt.show()
+        fig.tight_layout()
         return fig
 
+    def _render_png(self, chart, params, plot):
+        key = (self.cache_key, chart, params) if self.cache_key is not None else None
+        if key is not None:
+            with _png_cache_lock:
+                png = _png_cache.get(key)
+            if png is not None:
+                inc('chart_cache_total', chart=chart, result='hit')
+                return png
+            inc('chart_cache_total', chart=chart, result='miss')
+
+        with span('chart_render', chart=chart):
+            fig = plot()
+            try:
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format='png', transparent=True)
+                png = buffer.getvalue()
+            finally:
+                plt.close(fig)  # figures are never reused, don't let pyplot keep them alive
+
+        if key is not None:
+            with _png_cache_lock:
+                _png_cache[key] = png
+        logging.info("Rendered %s chart (%.0f kB)", chart, len(png) / 1e3)
+        return png
+
+    def tasks_png(self):
+        """PNG bytes of `plot_tasks`."""
+        return self._render_png('tasks', (), self.plot_tasks)
 
+    def workload_png(self, display_col, assignee=None):
+        """PNG bytes of `plot_workload_per_assignee`."""
+        return self._render_png('workload', (tuple(display_col), assignee),
+                                lambda: self.plot_workload_per_assignee(display_col, assignee))